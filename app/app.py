@@ -2,11 +2,16 @@
 import os
 import sys
 import logging
-import io
+import logging.handlers
 import time
 import tempfile
+import heapq
+import hashlib
 import shutil
+import stat
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 import pandas as pd
@@ -15,10 +20,21 @@ from openpyxl import load_workbook
 from PIL import Image as PILImage
 import json
 import platform
+import subprocess
 import traceback
+import weakref
+import html
 
 # Добавляем корневую папку проекта в PYTHONPATH
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# (скрипт выполняется заново при каждом rerun Streamlit, поэтому путь добавляется только один раз)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+# Папки проекта вычисляются один раз
+LOG_DIR = os.path.join(PROJECT_ROOT, 'logs')
+TEMP_DIR = os.path.join(PROJECT_ROOT, 'temp')
+PRESETS_DIR = os.path.join(PROJECT_ROOT, 'settings_presets')
 
 # Используем относительные импорты вместо абсолютных
 from utils import config_manager
@@ -28,104 +44,104 @@ from utils.config_manager import get_downloads_folder, ConfigManager
 # <<< ДОБАВЛЯЕМ ГЛОБАЛЬНЫЙ ИМПОРТ >>>
 from core.processor import process_excel_file 
 
-# Настройка логирования
-log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-os.makedirs(log_dir, exist_ok=True)
+# Настройка логирования.
+# Скрипт выполняется заново при каждом rerun Streamlit, а st.cache_resource выполняет
+# настройку один раз на процесс: иначе каждое действие пользователя заново чистило бы
+# папку логов, перезаписывало app_latest.log и пересоздавало обработчики
+@st.cache_resource(show_spinner=False)
+def init_logging() -> None:
+    """
+    Настраивает корневой логгер: ротация старых логов, новый файл app_latest.log
+    и буферизованный файловый обработчик.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
 
-# Ограничиваем количество файлов логов до 5 последних
-log_files = sorted([f for f in os.listdir(log_dir) if f.startswith('app_')])
-if len(log_files) > 5:
-    for old_log in log_files[:-5]:
-        try:
-            os.remove(os.path.join(log_dir, old_log))
-        except:
-            pass
-
-# Переименовываем текущий лог-файл, если он существует и создаем новый с правильной кодировкой
-log_file = os.path.join(log_dir, 'app_latest.log')
-# Всегда создаем новый лог-файл при запуске приложения
-try:
-    # Создаем новый файл с правильной кодировкой
-    with open(log_file, 'w', encoding='utf-8') as f:
-        f.write(f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")} - INFO - app - New log file created with UTF-8 encoding\n')
-except Exception as e:
-    print(f"Error creating log file: {e}")
-
-log_stream = io.StringIO()
-log_handler = logging.StreamHandler(log_stream)
-log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
-log_handler.setLevel(logging.INFO)
-
-# Используем один файл лога для всего приложения
-file_handler = logging.FileHandler(log_file, encoding='utf-8')
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
-file_handler.setLevel(logging.DEBUG)
-
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.DEBUG)
-# Удаляем существующие обработчики, если они есть
-for handler in root_logger.handlers[:]:
-    root_logger.removeHandler(handler)
-root_logger.addHandler(log_handler)
-root_logger.addHandler(file_handler)
-
-# Устанавливаем кодировку для логирования
-import sys
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
+    # Ограничиваем количество файлов логов до 5 последних
+    # (частичная сортировка через heapq по времени изменения; stat берется из записи scandir)
+    with os.scandir(LOG_DIR) as entries:
+        log_entries = [entry for entry in entries if entry.name.startswith('app_') and entry.is_file()]
+    if len(log_entries) > 5:
+        for old_log in heapq.nsmallest(len(log_entries) - 5, log_entries, key=lambda entry: entry.stat().st_mtime_ns):
+            try:
+                os.unlink(old_log.path)
+            except OSError:
+                pass
 
-log = logging.getLogger(__name__)
+    # Переименовываем текущий лог-файл, если он существует и создаем новый с правильной кодировкой
+    log_file = os.path.join(LOG_DIR, 'app_latest.log')
+    # Новый лог-файл создается один раз при запуске приложения
+    try:
+        # Создаем новый файл с правильной кодировкой
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write(f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")} - INFO - app - New log file created with UTF-8 encoding\n')
+    except Exception as e:
+        print(f"Error creating log file: {e}")
 
-# Определяем настройки по умолчанию
-default_settings = {
-    "paths": {
-        "images_folder_path": get_downloads_folder()
-    },
-    "excel_settings": {
-        "article_column": "A",
-        "image_column": "B",
-        "start_row": 1,
-        "adjust_cell_size": False,
-        "column_width": 150,
-        "row_height": 120,
-        "max_file_size_mb": 50,  # Максимальный размер результирующего файла в МБ
-        "max_total_file_size_mb": 20,  # New setting name
-        "image_background_color": "CCCCCC",
-        "disable_image_background": False
-    },
-    "check_images_on_startup": False
-}
+    # Используем один файл лога для всего приложения
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
+    file_handler.setLevel(logging.DEBUG)
+    
+    # Отладочные записи накапливаются в памяти и пишутся в файл пачкой вместо отдельной записи
+    # на каждую строку. Любая запись уровня INFO и выше сбрасывает буфер, поэтому app_latest.log
+    # отстает не более чем на серию DEBUG-записей. Буфер также сбрасывается при заполнении,
+    # при закрытии обработчика (в том числе через logging.shutdown) и перед чтением лога
+    # в core.processor.read_log_tail
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.INFO,
+        target=file_handler,
+        flushOnClose=True
+    )
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG)
+    # Удаляем существующие обработчики, если они есть (и закрываем их файлы)
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+        # MemoryHandler при закрытии сбрасывает буфер, но свой файловый обработчик не закрывает
+        if isinstance(handler, logging.handlers.MemoryHandler) and handler.target is not None:
+            handler.target.close()
+    root_logger.addHandler(buffered_file_handler)
+
+    # Устанавливаем кодировку для логирования
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+init_logging()
+log = logging.getLogger(__name__)
 
 # Инициализация менеджера конфигурации с созданием настроек по умолчанию
 def init_config_manager():
     """Инициализировать менеджер конфигурации и установить значения по умолчанию"""
     if 'config_manager' not in st.session_state:
-        # Определяем путь к папке с пресетами
-        presets_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'settings_presets')
-        
-        # Инициализируем config manager с указанием папки пресетов
-        config_manager_instance = config_manager.ConfigManager(presets_folder)
+        # Используем глобальный экземпляр из модуля config_manager (с уже загруженными настройками),
+        # чтобы сессия и остальной код работали с одними и теми же настройками
+        config_manager_instance = config_manager.get_config_manager()
         
         # Получаем путь к папке загрузок пользователя
         downloads_folder = get_downloads_folder()
         
-        # Устанавливаем значения по умолчанию, если они отсутствуют в конфиге
+        # Устанавливаем значения по умолчанию, если они отсутствуют в конфиге.
+        # Файл настроек перезаписывается, только если что-то действительно добавлено
+        missing_defaults = {}
         if not config_manager_instance.get_setting('paths.images_folder_path'):
-            config_manager_instance.set_setting('paths.images_folder_path', downloads_folder)
+            missing_defaults['paths.images_folder_path'] = downloads_folder
             # Логируем установку пути по умолчанию
             log.info(f"Установлен путь к папке с изображениями по умолчанию: {downloads_folder}")
             
         if not config_manager_instance.get_setting('excel_settings.max_file_size_mb'):
-            config_manager_instance.set_setting('excel_settings.max_file_size_mb', 20)
+            missing_defaults['excel_settings.max_file_size_mb'] = 20
             
         if not config_manager_instance.get_setting('image_settings.target_width'):
-            config_manager_instance.set_setting('image_settings.target_width', 800)
+            missing_defaults['image_settings.target_width'] = 800
             
         if not config_manager_instance.get_setting('image_settings.target_height'):
-            config_manager_instance.set_setting('image_settings.target_height', 600)
+            missing_defaults['image_settings.target_height'] = 600
         
         # Сохраняем конфигурацию
-        config_manager_instance.save_settings("Default")
+        config_manager_instance.batch_update(missing_defaults)
         
         # Сохраняем менеджер в session_state
         st.session_state.config_manager = config_manager_instance
@@ -134,28 +150,14 @@ def init_config_manager():
     
     return st.session_state.config_manager
 
-def get_downloads_folder():
-    """Получить путь к папке с изображениями по умолчанию"""
-    # Возвращаем сетевой путь вместо папки загрузок
-    return r"\\10.10.100.2\Foto"
-    
-    # Закомментированный код ниже - оригинальная функция для получения папки загрузок
-    # if platform.system() == "Windows":
-    #     import winreg
-    #     sub_key = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders'
-    #     downloads_guid = '{374DE290-123F-4565-9164-39C4925E467B}'
-    #     with winreg.OpenKey(winreg.HKEY_CURRENT_USER, sub_key) as key:
-    #         downloads_folder = winreg.QueryValueEx(key, downloads_guid)[0]
-    #         return downloads_folder
-    # elif platform.system() == "Darwin":  # macOS
-    #     return os.path.join(os.path.expanduser('~'), 'Downloads')
-    # else:  # Linux и другие системы
-    #     return os.path.join(os.path.expanduser('~'), 'Downloads')
-
 # Обновляем код инициализации для использования нашей функции
-config_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'settings_presets')
-# Инициализируем глобальный config_manager в модуле config_manager перед инициализацией нашего
-config_manager.init_config_manager(config_folder)
+config_folder = PRESETS_DIR
+# Инициализируем глобальный config_manager в модуле config_manager перед инициализацией нашего.
+# Модуль config_manager живет между перезапусками скрипта Streamlit, поэтому флаг
+# позволяет создать менеджер и прочитать настройки с диска только один раз за процесс
+if not getattr(config_manager, '_initialized', False):
+    config_manager.init_config_manager(config_folder)
+    config_manager._initialized = True
 init_config_manager()
 
 # Настройка параметров приложения
@@ -178,8 +180,7 @@ def ensure_temp_dir(prefix: str = "") -> str:
         Путь к временной директории
     """
     # Создаем временную директорию в папке проекта для лучшего доступа
-    project_dir = os.path.dirname(os.path.dirname(__file__))
-    temp_dir = os.path.join(project_dir, "temp")
+    temp_dir = TEMP_DIR
     
     # Создаем директорию, если она не существует
     try:
@@ -206,14 +207,14 @@ def cleanup_temp_files():
     """
     try:
         # Определяем путь к временной директории
-        temp_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'temp')
+        temp_dir = TEMP_DIR
         if not os.path.exists(temp_dir):
             os.makedirs(temp_dir, exist_ok=True)
             log.info(f"Создана временная директория: {temp_dir}")
             return
         
-        # Получаем время начала текущей сессии (приложение запущено)
-        session_start_time = datetime.now()
+        # Получаем время начала текущей сессии (приложение запущено), в секундах эпохи
+        session_start_time = time.time()
         
         # Максимальный возраст файлов, которые мы хотим сохранить (в минутах)
         # Сохраняем только файлы, созданные в течение последнего часа
@@ -226,16 +227,18 @@ def cleanup_temp_files():
         ]
         
         # Получаем список всех файлов в временной директории
-        all_files = os.listdir(temp_dir)
-        log.info(f"Найдено {len(all_files)} файлов в директории {temp_dir}")
-        
-        # Удаляем старые файлы, которые не используются в текущей сессии
-        removed_count = 0
-        for filename in all_files:
-            file_path = os.path.join(temp_dir, filename)
+        # (os.scandir сразу отдает тип записи, отдельный stat на проверку isfile не нужен)
+        with os.scandir(temp_dir) as entries:
+            all_entries = list(entries)
+        log.info(f"Найдено {len(all_entries)} файлов в директории {temp_dir}")
+        
+        # Отбираем старые файлы, которые не используются в текущей сессии
+        stale_files = []
+        for entry in all_entries:
+            file_path = entry.path
             
             # Пропускаем, если это не файл
-            if not os.path.isfile(file_path):
+            if not entry.is_file():
                 continue
                 
             # Проверяем, используется ли файл в текущей сессии
@@ -244,20 +247,31 @@ def cleanup_temp_files():
                 continue
                 
             # Получаем время последней модификации файла
+            # (stat записи scandir, возраст считается в секундах без создания объектов datetime)
             try:
-                file_mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-                file_age = session_start_time - file_mod_time
+                file_age = session_start_time - entry.stat().st_mtime
                 
                 # Если файл старше максимального возраста или не из текущей сессии
-                if file_age.total_seconds() > (max_age_minutes * 60):
-                    try:
-                        os.remove(file_path)
-                        removed_count += 1
-                        log.info(f"Удален старый временный файл: {file_path} (возраст: {file_age})")
-                    except Exception as e:
-                        log.error(f"Ошибка при удалении файла {file_path}: {e}")
+                if file_age > (max_age_minutes * 60):
+                    stale_files.append((file_path, file_age))
             except Exception as e:
                 log.error(f"Ошибка при проверке времени файла {file_path}: {e}")
+        
+        def remove_stale_file(stale_file):
+            file_path, file_age = stale_file
+            try:
+                os.remove(file_path)
+                log.info(f"Удален старый временный файл: {file_path} (возраст: {file_age / 60:.0f} мин)")
+                return True
+            except Exception as e:
+                log.error(f"Ошибка при удалении файла {file_path}: {e}")
+                return False
+        
+        # Удаляем файлы в несколько потоков: os.remove освобождает GIL на время системного вызова
+        removed_count = 0
+        if stale_files:
+            with ThreadPoolExecutor(max_workers=min(8, len(stale_files))) as executor:
+                removed_count = sum(executor.map(remove_stale_file, stale_files))
                     
         log.info(f"Очистка временных файлов завершена. Удалено {removed_count} файлов.")
     except Exception as e:
@@ -266,6 +280,13 @@ def cleanup_temp_files():
 # Вызываем очистку временных файлов при запуске приложения
 cleanup_temp_files()
 
+# CSS-классы записей журнала событий по уровню сообщения
+LOG_LEVEL_CSS_CLASSES = {
+    "ERROR": "log-error",
+    "WARNING": "log-warning",
+    "SUCCESS": "log-success",
+}
+
 # Функция для добавления сообщения в лог сессии
 def add_log_message(message, level="INFO"):
     """
@@ -275,15 +296,16 @@ def add_log_message(message, level="INFO"):
         message (str): Сообщение для добавления
         level (str): Уровень сообщения (INFO, WARNING, ERROR, SUCCESS)
     """
+    # Размер лога ограничен самой очередью: при переполнении старые сообщения вытесняются
     if 'log_messages' not in st.session_state:
-        st.session_state.log_messages = []
+        st.session_state.log_messages = deque(maxlen=100)
     
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    st.session_state.log_messages.append(f"[{timestamp}] [{level}] {message}")
-    
-    # Ограничиваем размер лога
-    if len(st.session_state.log_messages) > 100:
-        st.session_state.log_messages = st.session_state.log_messages[-100:]
+    # CSS-класс для журнала определяется один раз при добавлении сообщения
+    timestamp = time.strftime("%H:%M:%S")
+    st.session_state.log_messages.append((
+        LOG_LEVEL_CSS_CLASSES.get(level, "log-info"),
+        f"[{timestamp}] [{level}] {message}"
+    ))
     
     # Также добавляем в обычный лог
     if level == "ERROR":
@@ -293,20 +315,64 @@ def add_log_message(message, level="INFO"):
     else:
         log.info(message)
 
+# Функция для определения типа пути одним системным вызовом
+def get_path_kind(path: str) -> Optional[str]:
+    """
+    Определяет тип пути одним вызовом os.stat вместо пары os.path.exists/isfile/isdir.
+    
+    Args:
+        path (str): Путь к файлу или папке
+        
+    Returns:
+        Optional[str]: 'file', 'dir', 'other' или None, если путь недоступен
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except (OSError, ValueError):
+        return None
+    if stat.S_ISREG(mode):
+        return 'file'
+    if stat.S_ISDIR(mode):
+        return 'dir'
+    return 'other'
+
+# Функция для проверки доступности пути
+@st.cache_data(ttl=5, show_spinner=False)
+def is_path_available(path: str) -> bool:
+    """
+    Проверяет существование пути. Результат кэшируется на несколько секунд:
+    проверка вызывается при каждом rerun, а для сетевых папок может занимать заметное время.
+    
+    Args:
+        path (str): Путь к файлу или папке
+        
+    Returns:
+        bool: True, если путь существует
+    """
+    return os.path.exists(path)
+
 # Функция для обновления кнопок в сайдбаре была удалена
 # и заменена функциональностью в settings_tab
 
 # Функция для отображения настроек
 def show_settings():
     config_manager = st.session_state.config_manager
+    # Изменения настроек, которые сохраняются одной записью в конце отрисовки
+    pending_settings = {}
+    # Текущие значения настроек читаем из конфига один раз за прогон
+    settings_snapshot = config_manager.get_many({
+        'paths.images_folder_path': None,
+        'paths.secondary_images_folder_path': None,
+        'paths.tertiary_images_folder_path': None,
+        'excel_settings.max_total_file_size_mb': 20,
+    })
 
     # --- Настройки путей к папкам ---
     with st.sidebar.expander("Настройки путей", expanded=True):
-        # Получаем текущие значения из конфига
-        config_manager = st.session_state.config_manager
-        current_image_folder = config_manager.get_setting('paths.images_folder_path')
-        current_secondary_folder = config_manager.get_setting('paths.secondary_images_folder_path')
-        current_tertiary_folder = config_manager.get_setting('paths.tertiary_images_folder_path')
+        # Получаем текущие значения из снимка настроек
+        current_image_folder = settings_snapshot['paths.images_folder_path']
+        current_secondary_folder = settings_snapshot['paths.secondary_images_folder_path']
+        current_tertiary_folder = settings_snapshot['paths.tertiary_images_folder_path']
         
         # Добавляем пояснение
         st.markdown("### Пути к папкам с изображениями")
@@ -354,14 +420,14 @@ def show_settings():
             st.warning("⚠️ Основной путь указывает на сетевой диск. Убедитесь, что у вас есть доступ к этой папке через проводник Windows.")
         
         # Проверяем доступность основного пути
-        path_exists = os.path.exists(image_folder) if image_folder else False
+        path_exists = is_path_available(image_folder) if image_folder else False
         if path_exists:
             st.success("✅ Основной путь доступен")
         else:
             st.error("❌ Основной путь недоступен")
         
         # Проверяем доступность второго пути
-        secondary_path_exists = os.path.exists(secondary_folder) if secondary_folder else False
+        secondary_path_exists = is_path_available(secondary_folder) if secondary_folder else False
         if secondary_path_exists:
             st.success("✅ Запасной путь доступен")
         else:
@@ -369,7 +435,7 @@ def show_settings():
             
         # Проверяем доступность третьего пути, если он указан
         if tertiary_folder:
-            tertiary_path_exists = os.path.exists(tertiary_folder)
+            tertiary_path_exists = is_path_available(tertiary_folder)
             if tertiary_path_exists:
                 st.success("✅ Дополнительный запасной путь доступен")
             else:
@@ -377,24 +443,21 @@ def show_settings():
         
         # Если основной путь изменился, сохраняем его в конфиг и session_state
         if image_folder != current_image_folder:
-            config_manager.set_setting('paths.images_folder_path', image_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.images_folder_path'] = image_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.images_folder_path = image_folder
             log.info(f"Сохранен новый путь к основной папке с изображениями: {image_folder}")
             
         # Если второй путь изменился, сохраняем его в конфиг и session_state
         if secondary_folder != current_secondary_folder:
-            config_manager.set_setting('paths.secondary_images_folder_path', secondary_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.secondary_images_folder_path'] = secondary_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.secondary_images_folder_path = secondary_folder
             log.info(f"Сохранен новый путь к запасной папке с изображениями: {secondary_folder}")
             
         # Если третий путь изменился, сохраняем его в конфиг и session_state
         if tertiary_folder != current_tertiary_folder:
-            config_manager.set_setting('paths.tertiary_images_folder_path', tertiary_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.tertiary_images_folder_path'] = tertiary_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.tertiary_images_folder_path = tertiary_folder
             log.info(f"Сохранен новый путь к дополнительной запасной папке с изображениями: {tertiary_folder}")
@@ -403,16 +466,16 @@ def show_settings():
         if st.button("Сбросить пути к папкам изображений", 
                     help="Сбросить пути к папкам с изображениями на значения по умолчанию",
                     type="secondary"):
-            config_manager.set_setting('paths.images_folder_path', downloads_folder)
-            config_manager.set_setting('paths.secondary_images_folder_path', r"\\10.10.100.2\pictures")
-            config_manager.set_setting('paths.tertiary_images_folder_path', "")
+            config_manager.batch_update({
+                'paths.images_folder_path': downloads_folder,
+                'paths.secondary_images_folder_path': r"\\10.10.100.2\pictures",
+                'paths.tertiary_images_folder_path': "",
+            })
             
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.images_folder_path = downloads_folder
             st.session_state.secondary_images_folder_path = r"\\10.10.100.2\pictures"
             st.session_state.tertiary_images_folder_path = ""
-            
-            config_manager.save_settings("Default")
             st.success(f"Пути сброшены на значения по умолчанию")
             log.info(f"Пути сброшены на значения по умолчанию")
             st.rerun()
@@ -425,15 +488,39 @@ def show_settings():
             "Максимальный размер файла Excel (МБ)",
             min_value=1, # Minimum 1MB
             max_value=100, # Maximum 100MB
-            value=int(config_manager.get_setting('excel_settings.max_total_file_size_mb', 20)), 
+            value=int(settings_snapshot['excel_settings.max_total_file_size_mb']), 
             step=1, # Step 1MB
             help="Приблизительный максимальный размер итогового Excel-файла. Изображения будут сжаты для достижения этого лимита.",
             key="max_total_file_size_mb_input"
         )
-        if max_total_file_size_mb != config_manager.get_setting('excel_settings.max_total_file_size_mb', 20):
-            config_manager.set_setting('excel_settings.max_total_file_size_mb', max_total_file_size_mb)
-            config_manager.save_settings("Default") # Assuming 'Default' preset
+        if max_total_file_size_mb != settings_snapshot['excel_settings.max_total_file_size_mb']:
+            pending_settings['excel_settings.max_total_file_size_mb'] = max_total_file_size_mb
             log.info(f"Настройка max_total_file_size_mb изменена на: {max_total_file_size_mb}")
+    
+    # Сохраняем все изменения настроек одной записью
+    if pending_settings:
+        config_manager.batch_update(pending_settings)
+
+# Функция для подготовки фрагмента таблицы к отображению
+def to_display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит колонки с объектами к строкам для предотвращения ошибок с pyarrow
+    при отображении. Исходный DataFrame не изменяется, все колонки с объектами
+    преобразуются одной операцией.
+    
+    Args:
+        df (pd.DataFrame): Отображаемый фрагмент таблицы (например, df.head(10))
+        
+    Returns:
+        pd.DataFrame: Копия фрагмента со строковыми колонками вместо колонок с объектами
+        (или сам фрагмент, если таких колонок нет)
+    """
+    object_columns = df.select_dtypes(include=['object']).columns
+    if len(object_columns) == 0:
+        return df
+    display_df = df.copy()
+    display_df[object_columns] = display_df[object_columns].astype(str)
+    return display_df
 
 # Функция для отображения предпросмотра таблицы
 def show_table_preview(df):
@@ -442,15 +529,13 @@ def show_table_preview(df):
     """
     if df is not None and not df.empty:
         try:
-            # Преобразуем все столбцы с объектами в строки для предотвращения ошибок с pyarrow
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].astype(str)
-                
             # Выводим предпросмотр таблицы
             st.write("### Предпросмотр таблицы")
             
             # Отображаем только первые 10 строк для предпросмотра
-            st.dataframe(df.head(10), use_container_width=True)
+            # (статическая таблица вместо интерактивной сетки - для 10 строк ее достаточно).
+            # К строкам для pyarrow приводятся только отображаемые строки, а не вся таблица
+            st.table(to_display_frame(df.head(10)))
             
             # Отображаем информацию о количестве строк
             st.write(f"Всего строк в таблице: **{len(df)}**")
@@ -459,6 +544,55 @@ def show_table_preview(df):
     else:
         st.warning("Таблица пуста или не загружена.")
 
+# Функция для кэшированного чтения результата обработки для кнопки скачивания.
+# Время изменения и размер входят в ключ кэша, поэтому новый результат с тем же
+# именем файла читается заново, а при остальных перезапусках скрипта - нет
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_output_file_bytes(file_path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Возвращает содержимое файла результата (с кэшированием).
+    
+    Args:
+        file_path (str): Путь к файлу результата
+        mtime_ns (int): Время изменения файла в наносекундах (ключ кэша)
+        size (int): Размер файла в байтах (ключ кэша)
+        
+    Returns:
+        bytes: Содержимое файла
+    """
+    with open(file_path, "rb") as f:
+        return f.read()
+
+# Функции для кэшированного чтения Excel между перезапусками скрипта.
+# Временный файл назван по хешу содержимого, поэтому путь к нему однозначно
+# определяет содержимое и служит ключом кэша
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_sheet_names(file_path: str) -> List[str]:
+    """
+    Возвращает имена листов книги Excel (с кэшированием).
+    
+    Args:
+        file_path (str): Путь к временному файлу Excel
+        
+    Returns:
+        List[str]: Имена листов
+    """
+    return excel_utils.get_sheet_names(file_path)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_sheet_data(file_path: str, sheet_name: str) -> pd.DataFrame:
+    """
+    Возвращает данные листа Excel (с кэшированием), см. excel_utils.read_sheet_dataframe.
+    
+    Args:
+        file_path (str): Путь к временному файлу Excel
+        sheet_name (str): Имя листа
+        
+    Returns:
+        pd.DataFrame: Данные листа
+    """
+    return excel_utils.read_sheet_dataframe(file_path, sheet_name)
+
 # Функция для загрузки Excel файла
 def load_excel_file(uploaded_file_arg=None):
     # Используем файл из session_state, если аргумент не передан (для on_change)
@@ -470,6 +604,9 @@ def load_excel_file(uploaded_file_arg=None):
         st.session_state.selected_sheet = None
         st.session_state.df = None
         st.session_state.temp_file_path = None
+        st.session_state.uploaded_file_name = None
+        st.session_state.uploaded_file_hash = None
+        st.session_state.uploaded_file_id = None
         st.session_state.processing_error = None
         return
 
@@ -485,12 +622,13 @@ def load_excel_file(uploaded_file_arg=None):
         
     try:
         log.info(f"Загрузка листов из файла: {temp_file_path}")
-        excel_file = pd.ExcelFile(temp_file_path, engine='openpyxl')
-        all_sheets = excel_file.sheet_names
+        all_sheets = load_sheet_names(temp_file_path)
         
         # Фильтруем листы, исключая листы с макросами
         filtered_sheets = [sheet for sheet in all_sheets if not sheet.startswith('xl/macrosheets/')]
         st.session_state.available_sheets = filtered_sheets
+        # Позиции листов для выбора индекса в селекторе без поиска по списку при каждом перезапуске
+        st.session_state.sheet_index = {sheet: i for i, sheet in enumerate(filtered_sheets)}
         log.info(f"Все листы: {all_sheets}")
         log.info(f"Доступные листы (без макросов): {st.session_state.available_sheets}")
         
@@ -576,6 +714,11 @@ def all_inputs_valid():
         if not (article_col.isalpha() or article_col.isdigit()):
             log_msgs.append(f"Неверное обозначение колонки с артикулами: '{article_col}'. Используйте букву (A, B, C...) или номер (1, 2, 3...)")
             valid = False
+        elif not is_column_in_sheet(article_col, st.session_state.get('df')):
+            # Колонки нет на листе: обработка все равно завершилась бы ошибкой,
+            # но только после повторного открытия всей книги
+            log_msgs.append(f"Колонка с артикулами {article_col} отсутствует на выбранном листе")
+            valid = False
         else:
             log_msgs.append(f"Выбрана колонка артикулов: {article_col} ({article_col if article_col.isdigit() else f'столбец {article_col}'})")
 
@@ -597,20 +740,90 @@ def all_inputs_valid():
     if not images_folder:
         log_msgs.append("Папка с изображениями не указана в настройках")
         valid = False
-    elif not os.path.exists(images_folder):
+    elif not is_path_available(images_folder):
         log_msgs.append(f"Папка с изображениями не найдена: {images_folder}")
         valid = False
     else:
         log_msgs.append(f"Папка с изображениями найдена: {images_folder}")
 
-    # Логируем результат проверки
-    final_msg = "Проверка валидности завершена. Результат: " + ("Успешно" if valid else "Неуспешно")
-    log.info(final_msg)
-    for msg in log_msgs:
-        log.info(f"- {msg}")
+    # Логируем результат проверки одной записью: функция вызывается при каждом перезапуске
+    # скрипта, а каждая запись - это отдельная запись в файл лога
+    if log.isEnabledFor(logging.INFO):
+        final_msg = "Проверка валидности завершена. Результат: " + ("Успешно" if valid else "Неуспешно")
+        log.info(final_msg + "".join(f"\n- {msg}" for msg in log_msgs))
         
     return valid
 
+# Функция для проверки, что колонка с указанным обозначением есть на листе
+def is_column_in_sheet(column: str, df: Optional[pd.DataFrame]) -> bool:
+    """
+    Проверяет, что колонка с буквенным (A, B...) или числовым (1, 2...) обозначением
+    существует в данных листа, прочитанных без заголовка.
+    
+    Args:
+        column (str): Обозначение колонки
+        df (Optional[pd.DataFrame]): Данные листа
+        
+    Returns:
+        bool: True, если колонка есть на листе (или данные еще не загружены)
+    """
+    if df is None:
+        return True
+    try:
+        col_idx = excel_utils.column_letter_to_index(column.upper())
+    except ValueError:
+        return False
+    return 0 <= col_idx < df.shape[1]
+
+# Функция для проверки наличия хотя бы одного непустого значения в таблице
+def has_any_data(df: pd.DataFrame) -> bool:
+    """
+    Проверяет, есть ли в DataFrame хотя бы одно непустое значение.
+    В отличие от df.notna().sum().sum() не строит маску по всей таблице:
+    first_valid_index останавливается на первом непустом значении колонки,
+    а перебор колонок - на первой колонке с данными.
+    
+    Args:
+        df (pd.DataFrame): Проверяемая таблица
+        
+    Returns:
+        bool: True, если есть хотя бы одно непустое значение
+    """
+    for col in df.columns:
+        if df[col].first_valid_index() is not None:
+            return True
+    return False
+
+# Функция для расчета статистики по колонкам для предпросмотра
+def get_column_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Возвращает статистику по колонкам таблицы: тип данных, количество
+    и процент непустых значений. Количество непустых значений считается одной
+    векторной операцией, а результат запоминается для текущего DataFrame,
+    поэтому при перезапусках скрипта с той же таблицей не пересчитывается.
+    
+    Args:
+        df (pd.DataFrame): Таблица с данными
+        
+    Returns:
+        pd.DataFrame: Статистика по колонкам
+    """
+    # Храним слабую ссылку на таблицу: она не удерживает старый DataFrame в памяти,
+    # а после замены st.session_state.df перестает указывать на текущую таблицу
+    cached = st.session_state.get('column_stats_cache')
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+    
+    non_empty_counts = df.count()
+    col_stats = pd.DataFrame({
+        'Колонка': df.columns,
+        'Тип данных': df.dtypes.astype(str).values,
+        'Непустых значений': non_empty_counts.values,
+        'Процент заполнения': (non_empty_counts / len(df) * 100).round(2).values
+    })
+    st.session_state.column_stats_cache = (weakref.ref(df), col_stats)
+    return col_stats
+
 # Функция для обработки изменения выбранного листа
 def handle_sheet_change():
     """
@@ -634,46 +847,24 @@ def handle_sheet_change():
         try:
             log.info(f"Загрузка данных с листа: {selected_sheet}")
             
-            # Всегда используем фиксированные значения: без пропуска строк и заголовок в первой строке
-            df = pd.read_excel(
-                st.session_state.temp_file_path, 
-                sheet_name=selected_sheet, 
-                engine='openpyxl',
-                skiprows=0,
-                header=None
-            )
+            # Всегда используем фиксированные значения: без пропуска строк и без заголовка
+            df = load_sheet_data(st.session_state.temp_file_path, selected_sheet)
             
-            # Преобразуем все столбцы с объектами в строки для предотвращения ошибок с pyarrow
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].astype(str)
+            # Колонки с объектами к строкам для pyarrow здесь не приводятся: это делается
+            # только для отображаемых строк предпросмотра (to_display_frame)
             
             # Проверка на пустой DataFrame
-            log.info(f"Размер данных при смене листа: строк={df.shape[0]}, колонок={df.shape[1]}; пустой={df.empty}")
-            
-            if df.empty:
-                error_msg = f"Лист '{selected_sheet}' не содержит данных"
-                log.warning(error_msg)
-                st.session_state.processing_error = error_msg
-                st.session_state.df = None
-                return
-            
-            if df.shape[0] == 0:
-                error_msg = f"Лист '{selected_sheet}' не содержит строк с данными"
-                log.warning(error_msg)
-                st.session_state.processing_error = error_msg
-                st.session_state.df = None
-                return
-                
-            if df.shape[1] == 0:
-                error_msg = f"Лист '{selected_sheet}' не содержит колонок с данными"
-                log.warning(error_msg)
-                st.session_state.processing_error = error_msg
-                st.session_state.df = None
-                return
+            rows_count, cols_count = df.shape
+            log.info(f"Размер данных при смене листа: строк={rows_count}, колонок={cols_count}")
             
-            # Проверка на файл, который имеет колонки, но все значения в них NaN
-            if df.notna().sum().sum() == 0:
+            error_msg = None
+            if rows_count == 0 or cols_count == 0:
+                error_msg = f"Лист '{selected_sheet}' не содержит данных ({rows_count}×{cols_count})"
+            elif not has_any_data(df):
+                # Проверка на файл, который имеет колонки, но все значения в них NaN
                 error_msg = f"Лист '{selected_sheet}' содержит только пустые ячейки"
+            
+            if error_msg:
                 log.warning(error_msg)
                 st.session_state.processing_error = error_msg
                 st.session_state.df = None
@@ -703,6 +894,32 @@ def handle_sheet_change():
             st.session_state.df = None
 
 # Функция для загрузки файла Excel
+# Функция для отображения ошибки обработки с подсказкой для пустых данных
+def show_processing_error(error_message: str):
+    """
+    Отображает сообщение об ошибке обработки и, если ошибка связана с пустыми данными,
+    рекомендации по решению проблемы.
+    
+    Args:
+        error_message (str): Текст ошибки
+    """
+    st.markdown(f"""
+    <div class="error-message">
+        <strong>Ошибка:</strong> {error_message}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Добавляем подсказку для решения проблемы с пустыми данными
+    if "не содержит данных" in error_message or "содержит только пустые ячейки" in error_message:
+        st.info("""
+        **Рекомендации по решению проблемы:**
+        
+        1. Убедитесь, что файл Excel содержит данные в выбранном листе
+        2. Проверьте наличие невидимых форматирований или скрытых строк
+        3. Попробуйте открыть файл в Excel и пересохранить его
+        4. Убедитесь, что данные начинаются с первой строки и колонки
+        """)
+
 def file_uploader_section():
     """
     Отображает секцию для загрузки файла Excel.
@@ -710,138 +927,6 @@ def file_uploader_section():
     with st.container():
         st.write("## Загрузка файла Excel")
         
-        # CSS стили для кнопок и сообщений
-        st.markdown("""
-        <style>
-        /* Стили для большой зеленой кнопки */
-        .big-button-container {
-            display: flex;
-            justify-content: center;
-            margin: 20px 0;
-        }
-        
-        /* Увеличиваем высоту кнопок */
-        .stButton > button:not([kind="secondary"]) {
-            height: 80px !important;
-            font-size: 20px !important;
-            padding: 20px !important;
-            width: 100% !important;
-        }
-        
-        /* Специфичные стили для кнопки скачивания */
-        div[data-testid="stDownloadButton"] button {
-            height: 100px !important;
-            font-size: 24px !important;
-            padding: 25px !important;
-            width: 100% !important;
-            background-color: #4CAF50 !important;
-            color: white !important;
-            border: none !important;
-            border-radius: 8px !important;
-            transition: all 0.3s ease !important;
-        }
-        
-        div[data-testid="stDownloadButton"] button:hover {
-            background-color: #45a049 !important;
-            transform: scale(1.02) !important;
-        }
-        
-        /* Стиль для сообщений об ошибках */
-        .error-message {
-            color: #cc0000;
-            background-color: #ffeeee;
-            padding: 10px;
-            border-radius: 5px;
-            border-left: 5px solid #cc0000;
-            margin: 10px 0;
-        }
-        
-        /* Стиль для индикатора количества строк */
-        .row-count {
-            font-weight: bold;
-            color: #1f77b4;
-        }
-        
-        /* Стили для улучшения внешнего вида загрузчика файлов */
-        div[data-testid="stFileUploader"] {
-            border: 1px dashed #cccccc;
-            padding: 10px;
-            border-radius: 5px;
-            background-color: #f8f9fa;
-        }
-        
-        div[data-testid="stFileUploader"]:hover {
-            border-color: #4CAF50;
-            background-color: #f0f9f0;
-        }
-        
-        /* Стили для лога */
-        .log-container {
-            max-height: 300px;
-            overflow-y: auto;
-            font-family: monospace;
-            background-color: #f5f5f5;
-            padding: 10px;
-            border-radius: 5px;
-            border: 1px solid #ddd;
-            margin-top: 15px;
-        }
-        
-        .log-entry {
-            margin: 2px 0;
-            font-size: 12px;
-        }
-        
-        .log-info {
-            color: #0366d6;
-        }
-        
-        .log-warning {
-            color: #e36209;
-        }
-        
-        .log-error {
-            color: #d73a49;
-        }
-        
-        .log-success {
-            color: #22863a;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        # Стили для кнопок
-        big_green_button_style = """
-            background-color: #4CAF50;
-            color: white;
-            padding: 15px 32px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 16px;
-            margin: 4px 2px;
-            cursor: pointer;
-            border-radius: 8px;
-            border: none;
-            box-shadow: 0 4px 8px 0 rgba(0,0,0,0.2);
-            transition: 0.3s;
-        """
-        
-        inactive_button_style = """
-            background-color: #cccccc;
-            color: #666666;
-            padding: 15px 32px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 16px;
-            margin: 4px 2px;
-            cursor: not-allowed;
-            border-radius: 8px;
-            border: none;
-            box-shadow: none;
-        """
-        
         # Инициализируем переменные в session state, если их нет
         if 'df' not in st.session_state:
             st.session_state.df = None
@@ -855,12 +940,16 @@ def file_uploader_section():
             st.session_state.is_processing = False
         if 'output_file_path' not in st.session_state:
             st.session_state.output_file_path = None
+        if 'output_file_signature' not in st.session_state:
+            st.session_state.output_file_signature = None
         if 'selected_sheet' not in st.session_state:
             st.session_state.selected_sheet = None
         if 'available_sheets' not in st.session_state:
             st.session_state.available_sheets = []
+        if 'sheet_index' not in st.session_state:
+            st.session_state.sheet_index = {}
         if 'log_messages' not in st.session_state:
-            st.session_state.log_messages = []
+            st.session_state.log_messages = deque(maxlen=100)
             
         # Загрузчик файлов Excel
         uploaded_file = st.file_uploader("Выберите Excel файл для обработки", type=["xlsx", "xls"], key="file_uploader",
@@ -871,7 +960,16 @@ def file_uploader_section():
             st.write(f"**Загружен файл:** {uploaded_file.name}")
             
             current_temp_path = st.session_state.get('temp_file_path', '')
-            current_file_size = uploaded_file.size
+            
+            # Хеш содержимого однозначно определяет, новый ли это файл. Считается по буферу
+            # загрузки без копирования; BLAKE2b быстрее любого повторного разбора книги.
+            # Для той же загрузки (тот же file_id) хеш повторно не считается
+            upload_id = getattr(uploaded_file, 'file_id', None)
+            if upload_id is not None and upload_id == st.session_state.get('uploaded_file_id'):
+                file_digest = st.session_state.get('uploaded_file_hash')
+            else:
+                with uploaded_file.getbuffer() as file_buffer:
+                    file_digest = hashlib.blake2b(file_buffer, digest_size=16).hexdigest()
             
             # Проверка необходимости обновления файла
             need_update = False
@@ -881,26 +979,17 @@ def file_uploader_section():
                 # Файла еще нет, нужно сохранить
                 need_update = True
                 log.info(f"Файл отсутствует, сохраняем новый: {uploaded_file.name}")
-            elif os.path.basename(current_temp_path) != uploaded_file.name:
-                # Имя файла изменилось, нужно сохранить новый
+            elif st.session_state.get('uploaded_file_hash') != file_digest:
+                # Содержимое изменилось, заменяем файл.
+                # Предыдущий файл не удаляется: он назван по хешу содержимого и может
+                # использоваться другой сессией, устаревшие файлы удаляет cleanup_temp_files
                 need_update = True
-                log.info(f"Имя файла изменилось: {os.path.basename(current_temp_path)} -> {uploaded_file.name}")
-            else:
-                # Файл с таким же именем уже существует, проверяем размер
-                try:
-                    previous_size = os.path.getsize(current_temp_path)
-                    if previous_size != current_file_size:
-                        # Размер изменился, заменяем файл
-                        need_update = True
-                        log.info(f"Размер файла изменился: {previous_size} -> {current_file_size}")
-                        try:
-                            os.remove(current_temp_path)
-                            log.info(f"Удален предыдущий файл: {current_temp_path}")
-                        except Exception as e:
-                            log.error(f"Ошибка при удалении предыдущего файла: {e}")
-                except Exception as e:
-                    log.error(f"Ошибка при проверке размера файла {current_temp_path}: {e}")
-                    need_update = True
+                log.info(f"Содержимое файла изменилось: {uploaded_file.name}")
+            elif st.session_state.get('uploaded_file_name') != uploaded_file.name:
+                # То же содержимое под другим именем: сохранять и разбирать файл заново не нужно,
+                # обновляем только имя (из него строится имя выходного файла)
+                log.info(f"Имя файла изменилось: {st.session_state.get('uploaded_file_name')} -> {uploaded_file.name}")
+                st.session_state.uploaded_file_name = uploaded_file.name
             
             # Если требуется обновление, сохраняем файл
             if need_update:
@@ -922,11 +1011,28 @@ def file_uploader_section():
                 except Exception as e:
                     log.error(f"Ошибка при очистке промежуточных файлов: {e}")
                     
-                temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                with open(temp_file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                # Имя временного файла строится по хешу содержимого,
+                # поэтому повторная загрузка того же файла не пишет его на диск заново.
+                # Запись идет потоково блоками по 1 МБ, чтобы не держать в памяти вторую копию файла
+                file_ext = os.path.splitext(uploaded_file.name)[1]
+                temp_file_path = os.path.join(temp_dir, f"{file_digest}{file_ext}")
+                if not os.path.exists(temp_file_path):
+                    uploaded_file.seek(0)
+                    with open(temp_file_path, "wb") as f:
+                        shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
+                else:
+                    log.info(f"Файл с таким содержимым уже сохранен: {temp_file_path}")
+                    # Файл мог быть сохранен другой сессией давно: обновляем время изменения,
+                    # чтобы cleanup_temp_files в других сессиях не удалил его как устаревший
+                    try:
+                        os.utime(temp_file_path)
+                    except OSError as e:
+                        log.error(f"Ошибка при обновлении времени изменения файла {temp_file_path}: {e}")
                 st.session_state.temp_file_path = temp_file_path
-                add_log_message(f"Файл сохранен: {os.path.basename(temp_file_path)}", "INFO")
+                st.session_state.uploaded_file_name = uploaded_file.name
+                st.session_state.uploaded_file_hash = file_digest
+                st.session_state.uploaded_file_id = upload_id
+                add_log_message(f"Файл сохранен: {uploaded_file.name}", "INFO")
                 load_excel_file()
             
             # Удалены настройки пропуска начальных строк и строки с заголовками
@@ -936,29 +1042,14 @@ def file_uploader_section():
                     
             # Отображение ошибки обработки, если есть
             if st.session_state.processing_error:
-                st.markdown(f"""
-                <div class="error-message">
-                    <strong>Ошибка:</strong> {st.session_state.processing_error}
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Добавляем подсказку для решения проблемы с пустыми данными
-                if "не содержит данных" in st.session_state.processing_error or "содержит только пустые ячейки" in st.session_state.processing_error:
-                    st.info("""
-                    **Рекомендации по решению проблемы:**
-                    
-                    1. Убедитесь, что файл Excel содержит данные в выбранном листе
-                    2. Проверьте наличие невидимых форматирований или скрытых строк
-                    3. Попробуйте открыть файл в Excel и пересохранить его
-                    4. Убедитесь, что данные начинаются с первой строки и колонки
-                    """)
+                show_processing_error(st.session_state.processing_error)
                 
             # Если есть доступные листы, показываем селектор листов
             if st.session_state.available_sheets and len(st.session_state.available_sheets) > 0:
                 selected_sheet = st.selectbox(
                     "Выберите лист для обработки:",
                     st.session_state.available_sheets,
-                    index=st.session_state.available_sheets.index(st.session_state.selected_sheet) if st.session_state.selected_sheet in st.session_state.available_sheets else 0,
+                    index=st.session_state.sheet_index.get(st.session_state.selected_sheet, 0),
                     key="sheet_selector",
                     on_change=handle_sheet_change
                 )
@@ -966,39 +1057,34 @@ def file_uploader_section():
             # Если данные успешно загружены, показываем предпросмотр и селекторы колонок
             if st.session_state.df is not None:
                 # Отображение размерности данных
+                rows_count, cols_count = st.session_state.df.shape
                 col1, col2 = st.columns(2)
                 with col1:
                     st.markdown(f"""
                     <div class="row-count">
-                        Количество строк: {st.session_state.df.shape[0]}
+                        Количество строк: {rows_count}
                     </div>
                     """, unsafe_allow_html=True)
                 with col2:
-                    st.write(f"**Количество колонок:** {st.session_state.df.shape[1]}")
+                    st.write(f"**Количество колонок:** {cols_count}")
                 
-                # Добавляем предпросмотр данных
-                with st.expander("Предпросмотр данных", expanded=False):
-                    st.dataframe(st.session_state.df.head(10), use_container_width=True)
-                    
-                    # Добавляем статистику по колонкам
-                    col_stats = pd.DataFrame({
-                        'Колонка': st.session_state.df.columns,
-                        'Тип данных': [str(dtype) for dtype in st.session_state.df.dtypes.values],
-                        'Непустых значений': st.session_state.df.count().values,
-                        'Процент заполнения': (st.session_state.df.count() / len(st.session_state.df) * 100).round(2).values
-                    })
-                    st.write("### Статистика по колонкам")
-                    st.dataframe(col_stats, use_container_width=True)
+                # Добавляем предпросмотр данных.
+                # Содержимое свернутого st.expander все равно строится и отправляется в браузер
+                # при каждом перезапуске скрипта, поэтому таблицы выводятся только по запросу
+                if st.checkbox("Показать предпросмотр данных", key="show_preview"):
+                    with st.container():
+                        # Статическая таблица дешевле интерактивной сетки st.dataframe
+                        st.table(to_display_frame(st.session_state.df.head(10)))
+                        
+                        # Добавляем статистику по колонкам
+                        st.write("### Статистика по колонкам")
+                        st.table(get_column_stats(st.session_state.df))
                 
                 # Получение списка колонок
                 column_options = list(st.session_state.df.columns)
                 
                 # Если колонки есть, показываем селекторы
                 if column_options:
-                    # Определяем индексы по умолчанию (если колонки A/B существуют)
-                    default_article_index = column_options.index("A") if "A" in column_options else 0
-                    default_image_index = column_options.index("B") if "B" in column_options else min(1, len(column_options)-1)
-                    
                     # Позволяем пользователю ввести буквенные или числовые обозначения колонок
                     col1, col2 = st.columns(2)
                     with col1:
@@ -1034,8 +1120,11 @@ def file_uploader_section():
                     
                     # Запускаем обработку, если установлен флаг
                     if st.session_state.get('start_processing', False):
-                        st.info("Идет обработка файла. Не закрывайте страницу и не взаимодействуйте с интерфейсом до завершения.")
-                        st.write("Это может занять некоторое время в зависимости от количества строк и изображений.")
+                        # Уведомление выводится в заполнитель, чтобы убрать его после обработки
+                        processing_notice = st.empty()
+                        with processing_notice.container():
+                            st.info("Идет обработка файла. Не закрывайте страницу и не взаимодействуйте с интерфейсом до завершения.")
+                            st.write("Это может занять некоторое время в зависимости от количества строк и изображений.")
                         
                         # Блокируем интерфейс на время обработки
                         with st.spinner("Обработка файла..."):
@@ -1057,8 +1146,15 @@ def file_uploader_section():
                         # Сбрасываем флаг обработки
                         st.session_state.start_processing = False
                         
-                        # Форсируем перезагрузку страницы для обновления UI
-                        st.rerun()
+                        # Перезапуск скрипта не нужен: уведомление убирается, а результат и кнопка
+                        # скачивания выводятся ниже в этом же прогоне, так как флаг обработки уже сброшен.
+                        # Блок ошибки выше уже отрисован до обработки, поэтому ошибка с рекомендациями
+                        # выводится на место уведомления
+                        if not success and st.session_state.processing_error:
+                            with processing_notice.container():
+                                show_processing_error(st.session_state.processing_error)
+                        else:
+                            processing_notice.empty()
                     
             else:
                 st.warning("Файл не содержит колонок для выбора. Проверьте структуру Excel-файла.")
@@ -1085,21 +1181,30 @@ def file_uploader_section():
                 # Очищаем сообщение об ошибке после отображения
                 st.session_state.processing_error_message = None
             
-            # Добавление кнопки скачивания, если файл был обработан
-            if st.session_state.output_file_path and os.path.exists(st.session_state.output_file_path):
+            # Добавление кнопки скачивания, если файл был обработан.
+            # Время изменения и размер файла запоминаются при успешной обработке,
+            # поэтому при перезапусках скрипта файл результата не проверяется на диске
+            output_file_bytes = None
+            output_file_signature = st.session_state.get('output_file_signature')
+            if st.session_state.output_file_path and output_file_signature:
+                try:
+                    output_file_bytes = load_output_file_bytes(st.session_state.output_file_path, *output_file_signature)
+                except OSError as e:
+                    log.warning(f"Файл результата недоступен: {e}")
+                    st.session_state.output_file_signature = None
+            if output_file_bytes is not None:
                 # Создаем колонку для центрирования кнопки (опционально, для лучшего вида)
                 col1, col2, col3 = st.columns([1,2,1])
                 with col2:
-                    with open(st.session_state.output_file_path, "rb") as file:
-                        st.download_button(
-                            label="СКАЧАТЬ ОБРАБОТАННЫЙ ФАЙЛ",
-                            data=file,
-                            file_name=os.path.basename(st.session_state.output_file_path),
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True,
-                            type="primary",
-                            key="download_button"
-                        )
+                    st.download_button(
+                        label="СКАЧАТЬ ОБРАБОТАННЫЙ ФАЙЛ",
+                        data=output_file_bytes,
+                        file_name=os.path.basename(st.session_state.output_file_path),
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True,
+                        type="primary",
+                        key="download_button"
+                    )
         
         # Проверяем, нужно ли отобразить отчет о результатах обработки
         if st.session_state.get('show_processing_report', False):
@@ -1110,20 +1215,13 @@ def file_uploader_section():
         # Добавляем отображение логов вместо отладочной информации
         with st.expander("Журнал событий", expanded=False):
             # Отображаем сообщения из st.session_state.log_messages
+            # Весь журнал выводится одним элементом вместо отдельного st.markdown на каждую запись
             if 'log_messages' in st.session_state and st.session_state.log_messages:
-                st.markdown('<div class="log-container">', unsafe_allow_html=True)
-                for log_msg in st.session_state.log_messages:
-                    # Определяем класс для стилизации
-                    log_class = "log-info"
-                    if "ERROR" in log_msg:
-                        log_class = "log-error"
-                    elif "WARNING" in log_msg:
-                        log_class = "log-warning"
-                    elif "SUCCESS" in log_msg:
-                        log_class = "log-success"
-                        
-                    st.markdown(f'<div class="log-entry {log_class}">{log_msg}</div>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
+                log_entries_html = ''.join(
+                    f'<div class="log-entry {log_class}">{html.escape(log_msg)}</div>'
+                    for log_class, log_msg in st.session_state.log_messages
+                )
+                st.markdown(f'<div class="log-container">{log_entries_html}</div>', unsafe_allow_html=True)
             else:
                 st.info("Журнал пуст")
 
@@ -1143,9 +1241,16 @@ def process_files():
         # Отключаем взаимодействие с интерфейсом во время обработки
         # Показываем крутящийся индикатор загрузки
         with st.spinner("Идет обработка файла. Пожалуйста, подождите..."):
+            # Читаем нужные значения session_state один раз - каждое обращение идет через прокси
+            session_keys = ('df', 'temp_file_path', 'selected_sheet', 'article_column', 'image_column',
+                            'images_folder_path', 'secondary_images_folder_path', 'tertiary_images_folder_path',
+                            'disable_image_background', 'image_background_color', 'uploaded_file_name', 'header_row')
+            snap = {key: st.session_state.get(key) for key in session_keys}
+            
             # Получаем необходимые настройки
-            images_folder = st.session_state.get('images_folder_path', 
-                                               config_manager.get_setting("paths.images_folder_path", ""))
+            images_folder = snap['images_folder_path']
+            if images_folder is None:
+                images_folder = config_manager.get_setting("paths.images_folder_path", "")
     
             # Создаем директорию для хранения результатов
             temp_dir = ensure_temp_dir()
@@ -1153,43 +1258,38 @@ def process_files():
             
             add_log_message(f"Папка изображений: {images_folder}", "INFO")
             
-            # Детальная проверка всех условий
-            conditions = {
-                "DataFrame загружен": st.session_state.df is not None,
-                "Временный файл существует": st.session_state.temp_file_path is not None,
-                "Файл доступен": (os.path.exists(st.session_state.temp_file_path) and 
-                                  os.access(st.session_state.temp_file_path, os.R_OK)) if st.session_state.temp_file_path else False,
-                "Выбран лист": st.session_state.selected_sheet is not None,
-                "Указана колонка с артикулами": st.session_state.get('article_column') is not None,
-                "Указана колонка с изображениями": st.session_state.get('image_column') is not None,
-                "Папка изображений указана": images_folder != "",
-                "Папка изображений существует": os.path.exists(images_folder) if images_folder else False,
-                "Папка изображений доступна": (os.path.exists(images_folder) and 
-                                           os.access(images_folder, os.R_OK | os.X_OK)) if images_folder else False
-            }
-            
-            # Логируем все условия
-            for condition, result in conditions.items():
-                log.info(f"Проверка: {condition} = {result}")
-                add_log_message(f"Проверка: {condition} = {result}", "INFO" if result else "WARNING")
+            # Детальная проверка всех условий.
+            # Условия проверяются по порядку до первого невыполненного: сначала дешевые проверки
+            # значений, затем обращения к файловой системе (тип пути определяется одним stat)
+            conditions = [
+                ("DataFrame загружен", lambda: snap['df'] is not None),
+                ("Временный файл существует", lambda: snap['temp_file_path'] is not None),
+                ("Выбран лист", lambda: snap['selected_sheet'] is not None),
+                ("Указана колонка с артикулами", lambda: snap['article_column'] is not None),
+                ("Указана колонка с изображениями", lambda: snap['image_column'] is not None),
+                ("Папка изображений указана", lambda: images_folder != ""),
+                ("Файл доступен", lambda: (get_path_kind(snap['temp_file_path']) == 'file' and
+                                           os.access(snap['temp_file_path'], os.R_OK))),
+                ("Папка изображений существует", lambda: get_path_kind(images_folder) == 'dir'),
+                ("Папка изображений доступна", lambda: os.access(images_folder, os.R_OK | os.X_OK))
+            ]
             
-            # Проверяем все условия
-            all_conditions_met = all(conditions.values())
-            if not all_conditions_met:
-                failed_conditions = [cond for cond, result in conditions.items() if not result]
-                error_msg = f"Не выполнены следующие условия: {', '.join(failed_conditions)}"
+            failed_condition = next((condition for condition, check in conditions if not check()), None)
+            if failed_condition is not None:
+                error_msg = f"Не выполнено условие: {failed_condition}"
                 log.error(error_msg)
                 add_log_message(error_msg, "ERROR")
                 st.session_state.processing_error = error_msg
                 st.session_state.is_processing = False
                 return False
+            log.info(f"Все условия для обработки выполнены ({len(conditions)} проверок)")
                 
-            # Получаем данные из session_state
-            excel_file_path = st.session_state.temp_file_path
+            # Получаем данные из снимка session_state
+            excel_file_path = snap['temp_file_path']
             # <<< Используем ИМЕНА колонок из session_state >>>
-            article_col_name = st.session_state.get('article_column') 
-            image_col_name = st.session_state.get('image_column') 
-            selected_sheet = st.session_state.selected_sheet
+            article_col_name = snap['article_column']
+            image_col_name = snap['image_column']
+            selected_sheet = snap['selected_sheet']
             
             log.info(f"Параметры обработки:")
             log.info(f"- Файл: {excel_file_path}")
@@ -1198,30 +1298,22 @@ def process_files():
             log.info(f"- Колонка с изображениями: {image_col_name}") # Log name
             log.info(f"- Папка с изображениями: {images_folder}")
             
-            add_log_message(f"Обработка файла: {os.path.basename(excel_file_path)}, лист: {selected_sheet}", "INFO")
+            add_log_message(f"Обработка файла: {snap['uploaded_file_name'] or os.path.basename(excel_file_path)}, лист: {selected_sheet}", "INFO")
             add_log_message(f"Колонки: артикулы - {article_col_name}, изображения - {image_col_name}", "INFO") # Log names
             
-            # Создаем timestamp для временных файлов
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             try:
-                # Сначала копируем весь оригинальный файл вместо сохранения только выбранного листа
-                log.info(f"Создание копии оригинального Excel-файла")
-                temp_file_with_full_copy = os.path.join(output_folder, f"temp_full_{timestamp}.xlsx")
-                shutil.copy2(excel_file_path, temp_file_with_full_copy)
-                log.info(f"Создана полная копия исходного файла: {temp_file_with_full_copy}")
+                # Исходный временный файл передается в обработку напрямую, без полной копии:
+                # process_excel_file только читает его, а результат сохраняет в отдельный файл
                 
                 # Сохраняем оригинальное имя файла перед заменой пути
-                original_filename = os.path.basename(excel_file_path)
+                # (временный файл назван по хешу содержимого)
+                original_filename = snap['uploaded_file_name'] or os.path.basename(excel_file_path)
                 
                 # Создаем имя выходного файла, используя оригинальное имя
                 output_filename = f"{os.path.splitext(original_filename)[0]}_with Images.xlsx"
                 output_file_path = os.path.join(output_folder, output_filename)
                 log.info(f"Выходной файл будет: {output_file_path}")
                 add_log_message(f"Подготовка выходного файла: {output_filename}", "INFO")
-                
-                # Заменяем путь к файлу на временный
-                excel_file_path = temp_file_with_full_copy
 
                 # <<< ЛОГ ПЕРЕД ВЫЗОВОМ >>>
                 log.info("--- Готовимся к вызову process_excel_file ---")
@@ -1231,16 +1323,20 @@ def process_files():
                 log.info(f"  image_folder: {images_folder}")
                 
                 # Получаем пути к вторичной и третичной папкам
-                secondary_folder = st.session_state.get('secondary_images_folder_path', 
-                                                 config_manager.get_setting("paths.secondary_images_folder_path", ""))
-                tertiary_folder = st.session_state.get('tertiary_images_folder_path', 
-                                                config_manager.get_setting("paths.tertiary_images_folder_path", ""))
+                secondary_folder = snap['secondary_images_folder_path']
+                if secondary_folder is None:
+                    secondary_folder = config_manager.get_setting("paths.secondary_images_folder_path", "")
+                tertiary_folder = snap['tertiary_images_folder_path']
+                if tertiary_folder is None:
+                    tertiary_folder = config_manager.get_setting("paths.tertiary_images_folder_path", "")
                 
                 # Получаем настройки фона для ячеек с изображениями
-                disable_bg = st.session_state.get('disable_image_background', 
-                                             config_manager.get_setting("excel_settings.disable_image_background", False))
-                image_bg_color = st.session_state.get('image_background_color', 
-                                                 config_manager.get_setting("excel_settings.image_background_color", "CCCCCC"))
+                disable_bg = snap['disable_image_background']
+                if disable_bg is None:
+                    disable_bg = config_manager.get_setting("excel_settings.disable_image_background", False)
+                image_bg_color = snap['image_background_color']
+                if image_bg_color is None:
+                    image_bg_color = config_manager.get_setting("excel_settings.image_background_color", "CCCCCC")
                 
                 # Если фон отключен, устанавливаем None для background_color
                 bg_color = None if disable_bg else image_bg_color
@@ -1264,10 +1360,13 @@ def process_files():
                     tertiary_image_folder=tertiary_folder,    # Передаем путь к третичной папке
                     output_folder=output_folder,
                     max_total_file_size_mb=current_max_mb,
-                    header_row=st.session_state.get('header_row', 0),
+                    header_row=snap['header_row'] or 0,
                     sheet_name=selected_sheet,  # Добавляем передачу имени листа
                     output_filename=output_filename,  # Передаем готовое имя выходного файла
-                    image_background_color=bg_color  # Передаем цвет фона ячеек с изображениями
+                    image_background_color=bg_color,  # Передаем цвет фона ячеек с изображениями
+                    # Данные листа берутся из кэша load_sheet_data, заполненного при выборе листа,
+                    # поэтому файл не разбирается повторно
+                    sheet_data=load_sheet_data(excel_file_path, selected_sheet) if selected_sheet else None
                 )
 
                 # <<< ЛОГ ПОСЛЕ УСПЕШНОГО ВЫЗОВА >>>
@@ -1290,15 +1389,18 @@ def process_files():
                     st.session_state.multiple_images_found = multiple_images_found
 
                 # Проверяем, что результирующий файл создан
-                if not os.path.exists(result_file_path):
+                try:
+                    result_file_stat = os.stat(result_file_path)
+                except OSError:
                     error_msg = "Выходной файл не был создан, хотя ошибок не возникло"
                     log.error(error_msg)
                     add_log_message(error_msg, "ERROR")
                     st.session_state.processing_error = error_msg
                     return False
 
-                # Сохраняем путь к выходному файлу
+                # Сохраняем путь к выходному файлу и его время изменения и размер (ключ кэша для кнопки скачивания)
                 st.session_state.output_file_path = result_file_path
+                st.session_state.output_file_signature = (result_file_stat.st_mtime_ns, result_file_stat.st_size)
 
                 # Формируем сообщение об успешной обработке
                 success_msg = f"Обработка успешно завершена. Файл готов к скачиванию."
@@ -1362,9 +1464,41 @@ def show_results(stats: Dict[str, Any]):
         # Используем команду в зависимости от ОС
         if os.name == 'nt':  # Windows
             os.startfile(output_folder)
-        elif os.name == 'posix':  # macOS и Linux
-            os.system(f"open {output_folder}")  # macOS
-            # os.system(f"xdg-open {output_folder}")  # Linux
+        else:
+            # Запускаем программу напрямую, без оболочки: путь с пробелами передается как есть
+            opener = {"Darwin": "open", "Linux": "xdg-open"}.get(platform.system())
+            if opener:
+                subprocess.Popen([opener, output_folder])
+
+# Значения по умолчанию для переменных состояния сессии
+SESSION_STATE_DEFAULTS = {
+    'df': None,
+    'temp_file_path': None,
+    'uploaded_file_name': None,
+    'uploaded_file_hash': None,
+    'uploaded_file_id': None,
+    'processing_result': None,
+    'processing_error': None,
+    'is_processing': False,
+    'output_file_path': None,
+    'output_file_signature': None,
+    'selected_sheet': None,
+    'show_processing_report': False,
+    'needs_rerun': False,
+}
+
+# Переменные состояния сессии, начальные значения которых берутся из конфигурации:
+# {ключ: (путь к настройке, значение по умолчанию)}
+SESSION_STATE_SETTINGS = {
+    'article_column': ('excel_settings.article_column', "A"),
+    'image_column': ('excel_settings.image_column', "B"),
+    'images_folder_path': ('paths.images_folder_path', ""),
+    'secondary_images_folder_path': ('paths.secondary_images_folder_path', ""),
+    'tertiary_images_folder_path': ('paths.tertiary_images_folder_path', ""),
+    'header_row': ('excel_settings.start_row', 0),
+    'image_background_color': ('excel_settings.image_background_color', "CCCCCC"),
+    'disable_image_background': ('excel_settings.disable_image_background', False),
+}
 
 # Функция для инициализации переменных сессии
 def initialize_session_state():
@@ -1372,44 +1506,17 @@ def initialize_session_state():
     Инициализирует переменные состояния сессии, если они не существуют.
     """
     # НЕ инициализируем uploaded_file, так как Streamlit управляет им сам
-    if 'df' not in st.session_state:
-        st.session_state.df = None
-    if 'temp_file_path' not in st.session_state:
-        st.session_state.temp_file_path = None
-    if 'processing_result' not in st.session_state:
-        st.session_state.processing_result = None
-    if 'processing_error' not in st.session_state:
-        st.session_state.processing_error = None
-    if 'is_processing' not in st.session_state:
-        st.session_state.is_processing = False
-    if 'output_file_path' not in st.session_state:
-        st.session_state.output_file_path = None
-    if 'current_settings' not in st.session_state:
-        st.session_state.current_settings = config_manager.get_config_manager().current_settings
-    if 'selected_sheet' not in st.session_state:
-        st.session_state.selected_sheet = None
-    if 'article_column' not in st.session_state:
-        st.session_state.article_column = config_manager.get_setting('excel_settings.article_column', "A")
-    if 'image_column' not in st.session_state:
-        st.session_state.image_column = config_manager.get_setting('excel_settings.image_column', "B")
-    if 'images_folder_path' not in st.session_state:
-        st.session_state.images_folder_path = config_manager.get_setting('paths.images_folder_path', "")
-    if 'secondary_images_folder_path' not in st.session_state:
-        st.session_state.secondary_images_folder_path = config_manager.get_setting('paths.secondary_images_folder_path', "")
-    if 'tertiary_images_folder_path' not in st.session_state:
-        st.session_state.tertiary_images_folder_path = config_manager.get_setting('paths.tertiary_images_folder_path', "")
-    if 'header_row' not in st.session_state:
-        st.session_state.header_row = config_manager.get_setting('excel_settings.start_row', 0)
+    for key, value in SESSION_STATE_DEFAULTS.items():
+        st.session_state.setdefault(key, value)
     if 'sheet_names' not in st.session_state:
         st.session_state.sheet_names = []
-    if 'show_processing_report' not in st.session_state:
-        st.session_state.show_processing_report = False
-    if 'needs_rerun' not in st.session_state:
-        st.session_state.needs_rerun = False
-    if 'image_background_color' not in st.session_state:
-        st.session_state.image_background_color = config_manager.get_setting('excel_settings.image_background_color', "CCCCCC")
-    if 'disable_image_background' not in st.session_state:
-        st.session_state.disable_image_background = config_manager.get_setting('excel_settings.disable_image_background', False)
+    if 'current_settings' not in st.session_state:
+        st.session_state.current_settings = config_manager.get_config_manager().current_settings
+    
+    # Значения из конфигурации читаются только для ключей, которых еще нет в сессии
+    for key, (setting_path, default) in SESSION_STATE_SETTINGS.items():
+        if key not in st.session_state:
+            st.session_state[key] = config_manager.get_setting(setting_path, default)
 
 # Функция для отображения вкладки настроек в боковой панели
 def settings_tab():
@@ -1417,14 +1524,25 @@ def settings_tab():
     Отображает вкладку настроек в боковой панели.
     """
     st.sidebar.title("Настройки")
+    config_manager = st.session_state.config_manager
+    # Изменения настроек, которые сохраняются одной записью в конце отрисовки
+    pending_settings = {}
+    # Текущие значения настроек читаем из конфига один раз за прогон
+    settings_snapshot = config_manager.get_many({
+        'paths.images_folder_path': None,
+        'paths.secondary_images_folder_path': None,
+        'paths.tertiary_images_folder_path': None,
+        'excel_settings.max_total_file_size_mb': 20,
+        'excel_settings.image_background_color': "CCCCCC",
+        'excel_settings.disable_image_background': False,
+    })
     
     # --- Настройки путей к папкам ---
     with st.sidebar.expander("Настройки путей", expanded=True):
-        # Получаем текущие значения из конфига
-        config_manager = st.session_state.config_manager
-        current_image_folder = config_manager.get_setting('paths.images_folder_path')
-        current_secondary_folder = config_manager.get_setting('paths.secondary_images_folder_path')
-        current_tertiary_folder = config_manager.get_setting('paths.tertiary_images_folder_path')
+        # Получаем текущие значения из снимка настроек
+        current_image_folder = settings_snapshot['paths.images_folder_path']
+        current_secondary_folder = settings_snapshot['paths.secondary_images_folder_path']
+        current_tertiary_folder = settings_snapshot['paths.tertiary_images_folder_path']
         
         # Добавляем пояснение
         st.markdown("### Пути к папкам с изображениями")
@@ -1472,14 +1590,14 @@ def settings_tab():
             st.warning("⚠️ Основной путь указывает на сетевой диск. Убедитесь, что у вас есть доступ к этой папке через проводник Windows.")
         
         # Проверяем доступность основного пути
-        path_exists = os.path.exists(image_folder) if image_folder else False
+        path_exists = is_path_available(image_folder) if image_folder else False
         if path_exists:
             st.success("✅ Основной путь доступен")
         else:
             st.error("❌ Основной путь недоступен")
         
         # Проверяем доступность второго пути
-        secondary_path_exists = os.path.exists(secondary_folder) if secondary_folder else False
+        secondary_path_exists = is_path_available(secondary_folder) if secondary_folder else False
         if secondary_path_exists:
             st.success("✅ Запасной путь доступен")
         else:
@@ -1487,7 +1605,7 @@ def settings_tab():
             
         # Проверяем доступность третьего пути, если он указан
         if tertiary_folder:
-            tertiary_path_exists = os.path.exists(tertiary_folder)
+            tertiary_path_exists = is_path_available(tertiary_folder)
             if tertiary_path_exists:
                 st.success("✅ Дополнительный запасной путь доступен")
             else:
@@ -1495,24 +1613,21 @@ def settings_tab():
         
         # Если основной путь изменился, сохраняем его в конфиг и session_state
         if image_folder != current_image_folder:
-            config_manager.set_setting('paths.images_folder_path', image_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.images_folder_path'] = image_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.images_folder_path = image_folder
             log.info(f"Сохранен новый путь к основной папке с изображениями: {image_folder}")
             
         # Если второй путь изменился, сохраняем его в конфиг и session_state
         if secondary_folder != current_secondary_folder:
-            config_manager.set_setting('paths.secondary_images_folder_path', secondary_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.secondary_images_folder_path'] = secondary_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.secondary_images_folder_path = secondary_folder
             log.info(f"Сохранен новый путь к запасной папке с изображениями: {secondary_folder}")
             
         # Если третий путь изменился, сохраняем его в конфиг и session_state
         if tertiary_folder != current_tertiary_folder:
-            config_manager.set_setting('paths.tertiary_images_folder_path', tertiary_folder)
-            config_manager.save_settings("Default")
+            pending_settings['paths.tertiary_images_folder_path'] = tertiary_folder
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.tertiary_images_folder_path = tertiary_folder
             log.info(f"Сохранен новый путь к дополнительной запасной папке с изображениями: {tertiary_folder}")
@@ -1521,16 +1636,16 @@ def settings_tab():
         if st.button("Сбросить пути к папкам изображений", 
                     help="Сбросить пути к папкам с изображениями на значения по умолчанию",
                     type="secondary"):
-            config_manager.set_setting('paths.images_folder_path', downloads_folder)
-            config_manager.set_setting('paths.secondary_images_folder_path', r"\\10.10.100.2\pictures")
-            config_manager.set_setting('paths.tertiary_images_folder_path', "")
+            config_manager.batch_update({
+                'paths.images_folder_path': downloads_folder,
+                'paths.secondary_images_folder_path': r"\\10.10.100.2\pictures",
+                'paths.tertiary_images_folder_path': "",
+            })
             
             # Сохраняем в session_state для сохранения между перезагрузками
             st.session_state.images_folder_path = downloads_folder
             st.session_state.secondary_images_folder_path = r"\\10.10.100.2\pictures"
             st.session_state.tertiary_images_folder_path = ""
-            
-            config_manager.save_settings("Default")
             st.success(f"Пути сброшены на значения по умолчанию")
             log.info(f"Пути сброшены на значения по умолчанию")
             st.rerun()
@@ -1543,14 +1658,13 @@ def settings_tab():
             "Максимальный размер файла Excel (МБ)",
             min_value=1, # Minimum 1MB
             max_value=100, # Maximum 100MB
-            value=int(config_manager.get_setting('excel_settings.max_total_file_size_mb', 20)), 
+            value=int(settings_snapshot['excel_settings.max_total_file_size_mb']), 
             step=1, # Step 1MB
             help="Приблизительный максимальный размер итогового Excel-файла. Изображения будут сжаты для достижения этого лимита.",
             key="max_total_file_size_mb_input"
         )
-        if max_total_file_size_mb != config_manager.get_setting('excel_settings.max_total_file_size_mb', 20):
-            config_manager.set_setting('excel_settings.max_total_file_size_mb', max_total_file_size_mb)
-            config_manager.save_settings("Default")
+        if max_total_file_size_mb != settings_snapshot['excel_settings.max_total_file_size_mb']:
+            pending_settings['excel_settings.max_total_file_size_mb'] = max_total_file_size_mb
             log.info(f"Настройка max_total_file_size_mb изменена на: {max_total_file_size_mb}")
     
     # --- Настройки оформления ячеек с изображениями ---
@@ -1559,10 +1673,10 @@ def settings_tab():
         
         # Получаем текущие значения из сессии или конфига
         current_bg_color = st.session_state.get('image_background_color', 
-                                           config_manager.get_setting('excel_settings.image_background_color', "CCCCCC"))
+                                           settings_snapshot['excel_settings.image_background_color'])
         
         current_disable_bg = st.session_state.get('disable_image_background', 
-                                             config_manager.get_setting('excel_settings.disable_image_background', False))
+                                             settings_snapshot['excel_settings.disable_image_background'])
         
         # Флажок для отключения фона
         disable_bg = st.checkbox(
@@ -1640,27 +1754,20 @@ def settings_tab():
         
         # Сохраняем настройки, если они изменились
         if disable_bg != current_disable_bg:
-            config_manager.set_setting('excel_settings.disable_image_background', disable_bg)
-            config_manager.save_settings("Default")
+            pending_settings['excel_settings.disable_image_background'] = disable_bg
             st.session_state.disable_image_background = disable_bg
             log.info(f"Настройка отключения фона изменена на: {disable_bg}")
         
         if bg_color != current_bg_color and not disable_bg:
-            config_manager.set_setting('excel_settings.image_background_color', bg_color)
-            config_manager.save_settings("Default")
+            pending_settings['excel_settings.image_background_color'] = bg_color
             st.session_state.image_background_color = bg_color
             log.info(f"Настройка цвета фона изменена на: {bg_color}")
     
-    # Добавляем кнопку для полного сброса настроек
-    st.sidebar.markdown("""
-    <style>
-    div[data-testid="stButton"] button[kind="secondary"] {
-        background-color: #FF5555;
-        color: white;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Сохраняем все изменения настроек одной записью
+    if pending_settings:
+        config_manager.batch_update(pending_settings)
     
+    # Добавляем кнопку для полного сброса настроек (стиль кнопки задан в BASE_PAGE_CSS)
     if st.sidebar.button(
         'Сбросить все настройки', 
         key='sidebar_reset_all_button', 
@@ -1694,7 +1801,8 @@ def check_new_images_in_folder():
     Проверяет и обновляет изображения в указанной папке.
     """
     images_folder = config_manager.get_setting("paths.images_folder_path", "")
-    if not images_folder or not os.path.exists(images_folder):
+    # Проверка наличия папки кэшируется (is_path_available), так как функция вызывается при каждом перезапуске
+    if not images_folder or not is_path_available(images_folder):
         return
     
     st.info(f"Проверка изображений в папке: {images_folder}")
@@ -1709,16 +1817,24 @@ def show_custom_settings(key_prefix="", use_expanders=True):
         key_prefix (str): Префикс для ключей элементов
         use_expanders (bool): Использовать ли expanders для группировки настроек
     """
+    # Изменения настроек накапливаются и сохраняются в файл одной записью в конце
+    pending_settings = {}
+    
     # Функция для отображения настроек путей
     def show_paths_settings():
         """Отображение настроек путей"""
         st.subheader("Настройки путей")
         
-        # Получаем текущие значения из конфига
+        # Получаем текущие значения из конфига одним вызовом
         config_manager = st.session_state.config_manager
-        current_image_folder = config_manager.get_setting('paths.images_folder_path')
-        current_secondary_folder = config_manager.get_setting('paths.secondary_images_folder_path', '')
-        current_tertiary_folder = config_manager.get_setting('paths.tertiary_images_folder_path', '')
+        current_paths = config_manager.get_many({
+            'paths.images_folder_path': None,
+            'paths.secondary_images_folder_path': '',
+            'paths.tertiary_images_folder_path': '',
+        })
+        current_image_folder = current_paths['paths.images_folder_path']
+        current_secondary_folder = current_paths['paths.secondary_images_folder_path']
+        current_tertiary_folder = current_paths['paths.tertiary_images_folder_path']
         
         # Добавляем пояснение
         st.markdown("### Путь к папке с изображениями")
@@ -1753,34 +1869,32 @@ def show_custom_settings(key_prefix="", use_expanders=True):
         
         # Если путь изменился, сохраняем его в конфиг и session_state
         if image_folder != current_image_folder:
-            config_manager.set_setting('paths.images_folder_path', image_folder)
+            pending_settings['paths.images_folder_path'] = image_folder
             st.session_state.images_folder_path = image_folder
-            config_manager.save_settings("Default")
             log.info(f"Сохранен новый путь к основной папке с изображениями: {image_folder}")
             
         # Сохраняем пути к вторичной и третичной папкам
         if secondary_folder != current_secondary_folder:
-            config_manager.set_setting('paths.secondary_images_folder_path', secondary_folder)
+            pending_settings['paths.secondary_images_folder_path'] = secondary_folder
             st.session_state.secondary_images_folder_path = secondary_folder
-            config_manager.save_settings("Default")
             log.info(f"Сохранен новый путь к вторичной папке с изображениями: {secondary_folder}")
             
         if tertiary_folder != current_tertiary_folder:
-            config_manager.set_setting('paths.tertiary_images_folder_path', tertiary_folder)
+            pending_settings['paths.tertiary_images_folder_path'] = tertiary_folder
             st.session_state.tertiary_images_folder_path = tertiary_folder
-            config_manager.save_settings("Default")
             log.info(f"Сохранен новый путь к третичной папке с изображениями: {tertiary_folder}")
         
         # Добавляем кнопку сброса пути к значениям по умолчанию
         if st.button("Сбросить пути к папкам", key=f"{key_prefix}reset_path_button"):
             downloads_folder = get_downloads_folder()
-            config_manager.set_setting('paths.images_folder_path', downloads_folder)
-            config_manager.set_setting('paths.secondary_images_folder_path', r"\\10.10.100.2\pictures")
-            config_manager.set_setting('paths.tertiary_images_folder_path', '')
+            pending_settings.update({
+                'paths.images_folder_path': downloads_folder,
+                'paths.secondary_images_folder_path': r"\\10.10.100.2\pictures",
+                'paths.tertiary_images_folder_path': '',
+            })
             st.session_state.images_folder_path = downloads_folder
             st.session_state.secondary_images_folder_path = r"\\10.10.100.2\pictures"
             st.session_state.tertiary_images_folder_path = ''
-            config_manager.save_settings("Default")
             st.success(f"Пути сброшены. Основная папка: {downloads_folder}")
             log.info(f"Пути сброшены. Основная папка: {downloads_folder}")
     
@@ -1789,8 +1903,15 @@ def show_custom_settings(key_prefix="", use_expanders=True):
         """Отображение настроек изображений"""
         st.subheader("Настройки изображений")
         
-        # Получаем текущие значения из конфига
+        # Получаем текущие значения из конфига один раз: они используются
+        # и как значения виджетов, и для сравнения с введенными значениями
         config_manager = st.session_state.config_manager
+        current_image_settings = config_manager.get_many({
+            'excel_settings.max_total_file_size_mb': 20,
+            'image_settings.quality': 80,
+        })
+        current_max_file_size_mb = int(current_image_settings['excel_settings.max_total_file_size_mb'])
+        current_quality = int(current_image_settings['image_settings.quality'])
         
         # Максимальный размер Excel-файла
         st.markdown("### Ограничение размера файла")
@@ -1803,14 +1924,13 @@ def show_custom_settings(key_prefix="", use_expanders=True):
             "Максимальный размер Excel-файла (МБ)",
             min_value=1,
             max_value=100,
-            value=int(config_manager.get_setting('excel_settings.max_total_file_size_mb', 20)),
+            value=current_max_file_size_mb,
             key=f"{key_prefix}max_file_size_mb",
             help="Максимальный размер результирующего Excel-файла в мегабайтах"
         )
         
-        if max_file_size_mb != config_manager.get_setting('excel_settings.max_total_file_size_mb'):
-            config_manager.set_setting('excel_settings.max_total_file_size_mb', max_file_size_mb)
-            config_manager.save_settings("Default")
+        if max_file_size_mb != current_max_file_size_mb:
+            pending_settings['excel_settings.max_total_file_size_mb'] = max_file_size_mb
             log.info(f"Установлен максимальный размер Excel-файла: {max_file_size_mb} МБ")
         
         # Качество изображения
@@ -1824,21 +1944,21 @@ def show_custom_settings(key_prefix="", use_expanders=True):
             "Качество изображений",
             min_value=1,
             max_value=100,
-            value=int(config_manager.get_setting('image_settings.quality', 80)),
+            value=current_quality,
             key=f"{key_prefix}quality",
             help="Качество сжатия изображений (от 1 до 100)"
         )
         
-        if quality != config_manager.get_setting('image_settings.quality'):
-            config_manager.set_setting('image_settings.quality', quality)
-            config_manager.save_settings("Default")
+        if quality != current_quality:
+            pending_settings['image_settings.quality'] = quality
             log.info(f"Установлено качество изображений: {quality}")
         
         # Добавляем кнопку сброса настроек к значениям по умолчанию
         if st.button("Сбросить настройки изображений", key=f"{key_prefix}reset_image_settings"):
-            config_manager.set_setting('excel_settings.max_total_file_size_mb', 20)
-            config_manager.set_setting('image_settings.quality', 80)
-            config_manager.save_settings("Default")
+            pending_settings.update({
+                'excel_settings.max_total_file_size_mb': 20,
+                'image_settings.quality': 80,
+            })
             st.success("Настройки изображений сброшены к значениям по умолчанию")
             log.info("Настройки изображений сброшены к значениям по умолчанию")
     
@@ -1858,6 +1978,10 @@ def show_custom_settings(key_prefix="", use_expanders=True):
         
         st.subheader("Настройки изображений")
         show_image_settings()
+    
+    # Сохраняем все изменения настроек одной записью
+    if pending_settings:
+        st.session_state.config_manager.batch_update(pending_settings)
 
 # Функция для запуска процесса обработки через состояние сессии
 def trigger_processing():
@@ -1868,10 +1992,125 @@ def trigger_processing():
     st.session_state.start_processing = True
 
 # Главная функция приложения
+# CSS для скрытия меню и футера, для красной кнопки сброса настроек в сайдбаре
+# и для элементов секции загрузки файла (кнопки, загрузчик, сообщения, лог).
+# Строка собирается один раз при импорте модуля, а выводится одним элементом в начале
+# каждого прогона: Streamlit удаляет со страницы элементы, не отрисованные в текущем
+# прогоне, поэтому однократный вывод стили бы потерял
+BASE_PAGE_CSS = """
+    <style>
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    .main .block-container {padding-top: 0.5rem;}
+    div[data-testid="stButton"] button[kind="secondary"] {
+        background-color: #FF5555;
+        color: white;
+    }
+    
+    /* Стили для большой зеленой кнопки */
+    .big-button-container {
+        display: flex;
+        justify-content: center;
+        margin: 20px 0;
+    }
+    
+    /* Увеличиваем высоту кнопок */
+    .stButton > button:not([kind="secondary"]) {
+        height: 80px !important;
+        font-size: 20px !important;
+        padding: 20px !important;
+        width: 100% !important;
+    }
+    
+    /* Специфичные стили для кнопки скачивания */
+    div[data-testid="stDownloadButton"] button {
+        height: 100px !important;
+        font-size: 24px !important;
+        padding: 25px !important;
+        width: 100% !important;
+        background-color: #4CAF50 !important;
+        color: white !important;
+        border: none !important;
+        border-radius: 8px !important;
+        transition: all 0.3s ease !important;
+    }
+    
+    div[data-testid="stDownloadButton"] button:hover {
+        background-color: #45a049 !important;
+        transform: scale(1.02) !important;
+    }
+    
+    /* Стиль для сообщений об ошибках */
+    .error-message {
+        color: #cc0000;
+        background-color: #ffeeee;
+        padding: 10px;
+        border-radius: 5px;
+        border-left: 5px solid #cc0000;
+        margin: 10px 0;
+    }
+    
+    /* Стиль для индикатора количества строк */
+    .row-count {
+        font-weight: bold;
+        color: #1f77b4;
+    }
+    
+    /* Стили для улучшения внешнего вида загрузчика файлов */
+    div[data-testid="stFileUploader"] {
+        border: 1px dashed #cccccc;
+        padding: 10px;
+        border-radius: 5px;
+        background-color: #f8f9fa;
+    }
+    
+    div[data-testid="stFileUploader"]:hover {
+        border-color: #4CAF50;
+        background-color: #f0f9f0;
+    }
+    
+    /* Стили для лога */
+    .log-container {
+        max-height: 300px;
+        overflow-y: auto;
+        font-family: monospace;
+        background-color: #f5f5f5;
+        padding: 10px;
+        border-radius: 5px;
+        border: 1px solid #ddd;
+        margin-top: 15px;
+    }
+    
+    .log-entry {
+        margin: 2px 0;
+        font-size: 12px;
+    }
+    
+    .log-info {
+        color: #0366d6;
+    }
+    
+    .log-warning {
+        color: #e36209;
+    }
+    
+    .log-error {
+        color: #d73a49;
+    }
+    
+    .log-success {
+        color: #22863a;
+    }
+    </style>
+    """
+
 def main():
     """
     Главная функция приложения.
     """
+    # Добавляем CSS для скрытия меню и футера первым элементом страницы
+    st.markdown(BASE_PAGE_CSS, unsafe_allow_html=True)
+    
     # Проверяем наличие необходимых модулей
     check_required_modules()
     
@@ -1889,16 +2128,6 @@ def main():
         st.session_state['needs_rerun'] = False
         st.rerun()
     
-    # Добавляем CSS для скрытия меню и футера
-    st.markdown("""
-    <style>
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    .main .block-container {padding-top: 0.5rem;}
-    .stDataFrame {overflow-x: auto;}
-    </style>
-    """, unsafe_allow_html=True)
-    
     # --- Боковая панель ТОЛЬКО с настройками ---
     with st.sidebar:
         st.header("Настройки")
@@ -1910,26 +2139,30 @@ def main():
     file_uploader_section() # << Вызываем здесь, вне сайдбара
         
     # Проверка и обновление изображений в папке (если необходимо)
-    settings = config_manager.get_config_manager().current_settings
-    if settings and settings.get("check_images_on_startup", False):
+    if config_manager.get_setting("check_images_on_startup", False):
         check_new_images_in_folder()
 
+# Модули, необходимые для работы приложения: (имя модуля, описание)
+REQUIRED_MODULES = (
+    ("core.processor", "Основной обработчик Excel файлов"),
+    ("utils.image_utils", "Утилиты для работы с изображениями"),
+    ("utils.excel_utils", "Утилиты для работы с Excel"),
+    ("utils.config_manager", "Менеджер конфигурации"),
+)
+
 # Функция для проверки наличия требуемых модулей
 def check_required_modules():
     """
     Проверяет наличие всех необходимых модулей для работы приложения.
     """
-    # Список модулей для проверки
-    required_modules = [
-        ("core.processor", "Основной обработчик Excel файлов"),
-        ("utils.image_utils", "Утилиты для работы с изображениями"),
-        ("utils.excel_utils", "Утилиты для работы с Excel"),
-        ("utils.config_manager", "Менеджер конфигурации")
-    ]
+    # Модули не меняются между перезапусками скрипта, поэтому после успешной проверки
+    # в этой сессии повторно их не проверяем (и не пишем об этом в лог)
+    if st.session_state.get('required_modules_checked', False):
+        return True
     
     # Проверяем каждый модуль
     missing_modules = []
-    for module_name, description in required_modules:
+    for module_name, description in REQUIRED_MODULES:
         try:
             __import__(module_name)
             log.info(f"Модуль {module_name} успешно импортирован")
@@ -1976,35 +2209,39 @@ def check_required_modules():
             ```
             """)
         
-        # Выводим текущий PYTHONPATH
-        st.write("**Текущий PYTHONPATH:**")
-        st.code("\n".join(sys.path))
+        # Диагностика (PYTHONPATH и содержимое папок) собирается только по запросу:
+        # содержимое свернутого st.expander все равно выполнялось бы при каждом перезапуске
+        if st.checkbox("Показать диагностику", key="show_module_diagnostics"):
+            # Выводим текущий PYTHONPATH
+            st.write("**Текущий PYTHONPATH:**")
+            st.code("\n".join(sys.path))
         
-        # Выводим текущую директорию
-        st.write(f"**Текущая директория:** {os.getcwd()}")
-        st.write(f"**Директория приложения:** {os.path.dirname(__file__)}")
+            # Выводим текущую директорию
+            st.write(f"**Текущая директория:** {os.getcwd()}")
+            st.write(f"**Директория приложения:** {os.path.dirname(__file__)}")
         
-        # Выводим содержимое папок с модулями
-        try:
-            core_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'core')
-            utils_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'utils')
+            # Выводим содержимое папок с модулями
+            try:
+                core_dir = os.path.join(PROJECT_ROOT, 'core')
+                utils_dir = os.path.join(PROJECT_ROOT, 'utils')
             
-            st.write(f"**Содержимое директории core ({core_dir}):**")
-            if os.path.exists(core_dir):
-                st.code("\n".join(os.listdir(core_dir)))
-            else:
-                st.warning("Директория не существует")
+                st.write(f"**Содержимое директории core ({core_dir}):**")
+                if os.path.exists(core_dir):
+                    st.code("\n".join(os.listdir(core_dir)))
+                else:
+                    st.warning("Директория не существует")
                 
-            st.write(f"**Содержимое директории utils ({utils_dir}):**")
-            if os.path.exists(utils_dir):
-                st.code("\n".join(os.listdir(utils_dir)))
-            else:
-                st.warning("Директория не существует")
-        except Exception as e:
-            st.error(f"Ошибка при проверке директорий: {str(e)}")
+                st.write(f"**Содержимое директории utils ({utils_dir}):**")
+                if os.path.exists(utils_dir):
+                    st.code("\n".join(os.listdir(utils_dir)))
+                else:
+                    st.warning("Директория не существует")
+            except Exception as e:
+                st.error(f"Ошибка при проверке директорий: {str(e)}")
             
         return False
     
+    st.session_state.required_modules_checked = True
     return True
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 import os
 import sys
 import logging
+import multiprocessing
 import pandas as pd
-from datetime import datetime
 import tempfile
 from pathlib import Path
 import json
@@ -14,6 +14,8 @@ import shutil
 from PIL import Image as PILImage
 import re
 import io
+import mmap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # Add parent directory to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -49,6 +51,9 @@ EXCEL_WIDTH_TO_PIXEL_RATIO = 7.0  # Коэффициент преобразов
 EXCEL_PX_TO_PT_RATIO = 0.75  # Коэффициент преобразования пикселей в единицы Excel
 DEFAULT_EXCEL_COLUMN_WIDTH = 40  # Ширина колонки в единицах Excel (примерно 300px)
 MIN_COLUMN_WIDTH_PX = 100  # Минимальная допустимая ширина колонки в пикселях
+LOG_TAIL_BYTES = 64 * 1024  # Объем конца лог-файла, просматриваемый при поиске качества сжатия
+ROW_LOG_INTERVAL = 100  # Подробный вывод по строке делается только для каждой N-й строки
+MIN_PARALLEL_IMAGES = 8  # Минимум изображений, при котором запуск пула процессов окупается
 
 # <<< Constants for progress formatting >>>
 POWERSHELL_GREEN = '\033[92m'
@@ -111,6 +116,105 @@ def ensure_temp_dir(prefix: str = "") -> str:
     os.makedirs(temp_dir, exist_ok=True)
     return temp_dir
 
+def read_log_tail(log_path: str, max_bytes: int = LOG_TAIL_BYTES) -> List[str]:
+    """
+    Читает только последние max_bytes байт лог-файла вместо всего файла.
+    Файл отображается в память, поэтому система подгружает только страницы с его концом.
+    
+    Args:
+        log_path (str): Путь к лог-файлу
+        max_bytes (int): Максимальное количество байт с конца файла
+    
+    Returns:
+        List[str]: Строки из конца лог-файла
+    """
+    # Записи лога могут накапливаться в буфере обработчика (MemoryHandler),
+    # поэтому перед чтением сбрасываем их в файл
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    
+    if os.path.getsize(log_path) == 0:
+        # Пустой файл нельзя отобразить в память
+        return []
+    
+    with open(log_path, 'rb') as log_file:
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            start = max(0, len(log_map) - max_bytes)
+            if start > 0:
+                # Начинаем с первой полной строки, чтобы не получить обрезанную запись
+                newline_pos = log_map.find(b'\n', start)
+                start = newline_pos + 1 if newline_pos != -1 else start
+            tail = log_map[start:].decode('utf-8', errors='replace')
+    
+    return tail.splitlines()
+
+def optimize_images_parallel(image_paths: List[str], target_size_kb: float, quality: int) -> Dict[str, io.BytesIO]:
+    """
+    Оптимизирует несколько изображений параллельно в пуле процессов с фиксированным качеством.
+    Процессы запускаются методом spawn на всех платформах: fork из многопоточного процесса
+    сервера Streamlit может оставить процесс пула заблокированным на скопированной блокировке.
+    
+    Args:
+        image_paths (List[str]): Пути к изображениям
+        target_size_kb (float): Целевой размер одного изображения в КБ
+        quality (int): Качество JPEG (используется и как начальное, и как минимальное)
+    
+    Returns:
+        Dict[str, io.BytesIO]: Словарь {путь к изображению: буфер}. Изображения, которые не удалось
+        обработать в пуле, в словарь не попадают и оптимизируются последовательно
+    """
+    results = {}
+    if len(image_paths) < MIN_PARALLEL_IMAGES:
+        # Каждый процесс пула - новый интерпретатор с импортом модулей; для нескольких
+        # изображений их запуск дороже последовательной оптимизации
+        return results
+    
+    max_workers = min(len(image_paths), os.cpu_count() or 1)
+    print(f"[PROCESSOR] Параллельная оптимизация {len(image_paths)} изображений ({max_workers} процессов), качество {quality}%", file=sys.stderr)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(image_utils.optimize_image_for_excel, path, target_size_kb, quality, quality): path
+                for path in image_paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    print(f"[PROCESSOR WARNING] Ошибка параллельной оптимизации {path}: {e}", file=sys.stderr)
+    except Exception as pool_e:
+        print(f"[PROCESSOR WARNING] Пул процессов недоступен, оптимизация будет последовательной: {pool_e}", file=sys.stderr)
+    
+    return results
+
+def get_image_sizes_parallel(image_paths: List[str]) -> Dict[str, int]:
+    """
+    Получает размеры файлов изображений параллельно в пуле потоков.
+    Папки с изображениями обычно находятся в сети, где каждый stat - это
+    сетевой запрос; потоки выполняют их одновременно (GIL на время вызова освобождается).
+    
+    Args:
+        image_paths (List[str]): Пути к изображениям
+    
+    Returns:
+        Dict[str, int]: Словарь {путь к изображению: размер в байтах}. Недоступные файлы
+        в словарь не попадают
+    """
+    def get_size(path):
+        try:
+            return path, os.path.getsize(path)
+        except OSError:
+            return path, None
+    
+    if not image_paths:
+        return {}
+    
+    max_workers = min(16, len(image_paths), (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return {path: size for path, size in executor.map(get_size, image_paths) if size is not None}
+
 def process_excel_file(
     file_path: str,
     article_col_name: str,
@@ -125,7 +229,8 @@ def process_excel_file(
     secondary_image_folder: str = None,  # Папка с запасными изображениями (второй приоритет)
     tertiary_image_folder: str = None,   # Папка с дополнительными запасными изображениями (третий приоритет)
     output_filename: str = None,  # Имя выходного файла
-    image_background_color: str = "000000"  # Цвет фона ячейки (по умолчанию черный)
+    image_background_color: str = "000000",  # Цвет фона ячейки (по умолчанию черный)
+    sheet_data: Optional[pd.DataFrame] = None  # Уже прочитанные данные листа (header=None)
 ) -> Tuple[str, Optional[pd.DataFrame], int, Dict[str, List[str]], List[str], List[Dict]]:
     """
     Обрабатывает Excel файл, вставляя изображения на основе номеров артикулов.
@@ -145,6 +250,8 @@ def process_excel_file(
         tertiary_image_folder (str, optional): Путь к дополнительной папке с запасными изображениями. По умолчанию None
         output_filename (str, optional): Имя выходного файла. По умолчанию None
         image_background_color (str, optional): Цвет фона ячеек с изображениями в формате RRGGBB. По умолчанию "000000" (черный)
+        sheet_data (pd.DataFrame, optional): Данные листа sheet_name, уже прочитанные без заголовка
+            (например, из кэша приложения). Если передано, лист повторно не читается. По умолчанию None
     
     Returns:
         Tuple[str, pd.DataFrame, int, Dict[str, List[str]], List[str], List[Dict]]: 
@@ -200,15 +307,13 @@ def process_excel_file(
 
     # --- Чтение Excel ---
     try:
+        # Если данные листа уже прочитаны вызывающей стороной, используем их
+        if sheet_name and sheet_data is not None:
+            df = sheet_data
+            print(f"[PROCESSOR] Используются ранее прочитанные данные листа (sheet={sheet_name}, header=None). Строк данных: {len(df)}", file=sys.stderr)
         # Если указан конкретный лист, читаем его
-        if sheet_name:
-            df = pd.read_excel(
-                file_path,
-                sheet_name=sheet_name,
-                engine='openpyxl',
-                skiprows=0,
-                header=None
-            )
+        elif sheet_name:
+            df = excel_utils.read_sheet_dataframe(file_path, sheet_name)
             print(f"[PROCESSOR] Excel-файл прочитан в DataFrame (sheet={sheet_name}, header=None). Строк данных: {len(df)}", file=sys.stderr)
         else:
             df = pd.read_excel(file_path, header=0, engine='openpyxl') 
@@ -290,7 +395,9 @@ def process_excel_file(
 
     # --- Определение КОЛИЧЕСТВА строк с НЕНУЛЕВЫМИ артикулами для расчета лимита ---
     # Считаем строки, где артикул не пустой
-    non_empty_article_rows = df[article_col_name].notna() & (df[article_col_name].astype(str).str.strip() != '')
+    # (колонка уже приведена к строкам, обрезанные значения переиспользуются в цикле обработки)
+    stripped_articles = df[article_col_name].str.strip()
+    non_empty_article_rows = df[article_col_name].notna() & (stripped_articles != '')
     article_count = non_empty_article_rows.sum()
     
     if article_count == 0:
@@ -367,24 +474,28 @@ def process_excel_file(
     # Общее количество строк для расчета прогресса
     total_rows = len(df)
     
-    # Итерация по строкам таблицы
-    for excel_row_index, row in df.iterrows():
-        # Проверяем, нужно ли обновить прогресс
-        if progress_callback and excel_row_index % 5 == 0:  # Обновление каждые 5 строк
-            progress_value = min(0.9, (excel_row_index / len(df)) * 0.9)  # 90% прогресса на обработку строк
-            progress_callback(progress_value, f"Обработка строки {excel_row_index + 1} из {len(df)}")
-        
-        rows_processed += 1
-        
-        # Сначала получаем артикул
-        article_str = str(row[article_col_name]).strip()
-        
-        print(f"[PROCESSOR] Обработка строки {excel_row_index}, артикул: '{article_str}'", file=sys.stderr)
-        
-        if pd.isna(row[article_col_name]) or article_str.strip() == "":
-            print(f"[PROCESSOR]   Пустой артикул в строке {excel_row_index}, пропускаем", file=sys.stderr)
+    # Обрезку пробелов и отбор непустых артикулов выполняем одним векторным проходом
+    # до цикла (маска non_empty_article_rows уже посчитана выше для расчета лимита)
+    article_strs = stripped_articles.tolist()
+    has_article = non_empty_article_rows.to_numpy()
+    
+    # --- Поиск изображений для всех строк ---
+    # Поиск выполняется до вставки, чтобы заранее знать все изображения,
+    # которым потребуется оптимизация, и сжимать их параллельно.
+    # Список результатов по строкам выделяется сразу под все строки (None - строка без артикула)
+    row_search_results = [None] * total_rows
+    # Индексы папок с изображениями сохраняются между запусками и перестраиваются,
+    # только если содержимое папок изменилось; далее переиспользуются для всех артикулов
+    image_utils.invalidate_stale_folder_indexes()
+    # Результаты поиска по артикулам: повторяющиеся артикулы ищутся только один раз
+    article_search_cache = {}
+    for excel_row_index, (article_str, is_valid_article) in enumerate(zip(article_strs, has_article)):
+        if not is_valid_article:
             continue
         
+        # Подробный вывод только для каждой ROW_LOG_INTERVAL-й строки
+        verbose_row = excel_row_index % ROW_LOG_INTERVAL == 0
+        
         # Find images for this article in multiple folders
         supported_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
         
@@ -392,20 +503,29 @@ def process_excel_file(
         secondary_folder_path = secondary_image_folder or config_manager.get_setting("paths.secondary_images_folder_path", "")
         tertiary_folder_path = tertiary_image_folder or config_manager.get_setting("paths.tertiary_images_folder_path", "")
         
-        # Логируем папки для диагностики
-        print(f"[PROCESSOR DEBUG] Поиск изображений для артикула '{article_str}' в папках:", file=sys.stderr)
-        print(f"[PROCESSOR DEBUG]   Основная: {image_folder}", file=sys.stderr)
-        print(f"[PROCESSOR DEBUG]   Вторичная: {secondary_folder_path}", file=sys.stderr)
-        print(f"[PROCESSOR DEBUG]   Третичная: {tertiary_folder_path}", file=sys.stderr)
-        
-        search_result = image_utils.find_images_in_multiple_folders(
-            article_str, 
-            image_folder,
-            secondary_folder_path,
-            tertiary_folder_path,
-            supported_extensions,
-            search_recursively=True
-        )
+        cached_search_result = article_search_cache.get(article_str)
+        if cached_search_result is not None:
+            # Артикул уже встречался - копируем результат, чтобы у каждой строки был свой row_index
+            if verbose_row:
+                print(f"[PROCESSOR DEBUG] Артикул '{article_str}' уже искали, используем найденный результат", file=sys.stderr)
+            search_result = dict(cached_search_result)
+        else:
+            # Логируем папки для диагностики
+            if verbose_row:
+                print(f"[PROCESSOR DEBUG] Поиск изображений для артикула '{article_str}' в папках:", file=sys.stderr)
+                print(f"[PROCESSOR DEBUG]   Основная: {image_folder}", file=sys.stderr)
+                print(f"[PROCESSOR DEBUG]   Вторичная: {secondary_folder_path}", file=sys.stderr)
+                print(f"[PROCESSOR DEBUG]   Третичная: {tertiary_folder_path}", file=sys.stderr)
+            
+            search_result = image_utils.find_images_in_multiple_folders(
+                article_str, 
+                image_folder,
+                secondary_folder_path,
+                tertiary_folder_path,
+                supported_extensions,
+                search_recursively=True
+            )
+            article_search_cache[article_str] = search_result
         
         # Добавляем результат поиска в список
         search_result['row_index'] = excel_row_index
@@ -416,6 +536,42 @@ def process_excel_file(
             'tertiary': tertiary_folder_path
         }
         image_search_results.append(search_result)
+        row_search_results[excel_row_index] = search_result
+    
+    # Буферы уже оптимизированных изображений (ключ - путь к исходному изображению):
+    # сжатые параллельно и сжатые ранее в этом запуске. Изображение, повторяющееся
+    # в нескольких строках, сжимается только один раз
+    parallel_buffers = {}
+    
+    # Размеры всех найденных изображений запрашиваем заранее и параллельно
+    image_file_sizes = get_image_sizes_parallel(list(dict.fromkeys(
+        result["images"][0] for result in row_search_results if result is not None and result["found"]
+    )))
+    
+    # Префикс пути для отладочных копий изображений вычисляем один раз, а не для каждой строки
+    temp_dir_prefix = tempfile.gettempdir() + os.sep
+    
+    # Итерация по строкам таблицы
+    for excel_row_index, (article_str, is_valid_article) in enumerate(zip(article_strs, has_article)):
+        # Проверяем, нужно ли обновить прогресс
+        if progress_callback and excel_row_index % 5 == 0:  # Обновление каждые 5 строк
+            progress_value = min(0.9, (excel_row_index / len(df)) * 0.9)  # 90% прогресса на обработку строк
+            progress_callback(progress_value, f"Обработка строки {excel_row_index + 1} из {len(df)}")
+        
+        rows_processed += 1
+        # Подробный вывод только для каждой ROW_LOG_INTERVAL-й строки, предупреждения и ошибки выводятся всегда
+        verbose_row = excel_row_index % ROW_LOG_INTERVAL == 0
+        
+        if verbose_row:
+            print(f"[PROCESSOR] Обработка строки {excel_row_index}, артикул: '{article_str}'", file=sys.stderr)
+        
+        if not is_valid_article:
+            if verbose_row:
+                print(f"[PROCESSOR]   Пустой артикул в строке {excel_row_index}, пропускаем", file=sys.stderr)
+            continue
+        
+        # Результат поиска получен заранее, до цикла вставки
+        search_result = row_search_results[excel_row_index]
         
         # If no images found, record and continue
         if not search_result["found"]:
@@ -434,22 +590,29 @@ def process_excel_file(
             # Still proceed with the first image
         
         image_path = all_image_paths[0]
-        print(f"[PROCESSOR]   Выбрано первое найденное изображение: {image_path} (папка приоритета {source_folder_priority})", file=sys.stderr)
+        if verbose_row:
+            print(f"[PROCESSOR]   Выбрано первое найденное изображение: {image_path} (папка приоритета {source_folder_priority})", file=sys.stderr)
 
         # Проверяем, удовлетворяет ли изображение требованиям по размеру
-        original_size_kb = os.path.getsize(image_path) / 1024
-        print(f"[PROCESSOR]   Размер исходного изображения: {original_size_kb:.1f} КБ, лимит: {target_kb_per_image:.1f} КБ", file=sys.stderr)
+        original_size_bytes = image_file_sizes.get(image_path)
+        if original_size_bytes is None:
+            original_size_bytes = os.path.getsize(image_path)
+        original_size_kb = original_size_bytes / 1024
+        if verbose_row:
+            print(f"[PROCESSOR]   Размер исходного изображения: {original_size_kb:.1f} КБ, лимит: {target_kb_per_image:.1f} КБ", file=sys.stderr)
         
         # 1. ОПТИМИЗАЦИЯ ИЗОБРАЖЕНИЯ (если требуется)
         optimized_buffer = None
         
         if original_size_kb <= target_kb_per_image:
             # Если размер уже подходит, просто загружаем изображение без оптимизации
-            print(f"[PROCESSOR]   Изображение уже удовлетворяет требованиям по размеру, загружаем без оптимизации", file=sys.stderr)
+            if verbose_row:
+                print(f"[PROCESSOR]   Изображение уже удовлетворяет требованиям по размеру, загружаем без оптимизации", file=sys.stderr)
             try:
                 with open(image_path, 'rb') as f_orig:
                     optimized_buffer = io.BytesIO(f_orig.read())
-                print(f"[PROCESSOR]   Загружено без оптимизации, размер: {optimized_buffer.tell()/1024:.1f} КБ", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR]   Загружено без оптимизации, размер: {optimized_buffer.tell()/1024:.1f} КБ", file=sys.stderr)
                 optimized_buffer.seek(0)
             except Exception as e:
                 print(f"[PROCESSOR ERROR]   Ошибка при загрузке изображения без оптимизации: {e}", file=sys.stderr)
@@ -484,87 +647,116 @@ def process_excel_file(
                             quality_found = False
                             
                             # Попытка найти в логах
-                            with open("logs/app_latest.log", "r", encoding="utf-8") as log_file:
-                                log_lines = log_file.readlines()
-                                # Ищем два типа строк с информацией о качестве
-                                quality_pattern1 = re.compile(r'\[optimize_excel\] Итоговое качество сжатия: (\d+)%')
-                                quality_pattern2 = re.compile(r'-> Успех! Размер .* c качеством (\d+)')
-                                # Добавляем поиск специального маркера
-                                quality_marker = re.compile(r'\[QUALITY_MARKER\] НАЙДЕНО_КАЧЕСТВО_ДЛЯ_ИЗОБРАЖЕНИЯ: (\d+)')
-                                
-                                # Сначала ищем в последних 100 строках (самая свежая информация)
-                                recent_lines = log_lines[-100:] if len(log_lines) > 100 else log_lines
-                                
-                                for line in reversed(recent_lines):
-                                    # Приоритетно ищем специальный маркер
-                                    match = quality_marker.search(line)
-                                    if match:
-                                        found_quality = int(match.group(1))
-                                        successful_quality = found_quality
-                                        print(f"[PROCESSOR]   НАЙДЕН СПЕЦИАЛЬНЫЙ МАРКЕР КАЧЕСТВА: {successful_quality}%", file=sys.stderr)
-                                        quality_found = True
-                                        break
-                                        
+                            # Читаем только хвост лог-файла: записи текущего запуска находятся в конце,
+                            # а чтение всего файла целиком растет вместе с логом
+                            log_lines = read_log_tail("logs/app_latest.log")
+                            # Ищем два типа строк с информацией о качестве
+                            quality_pattern1 = re.compile(r'\[optimize_excel\] Итоговое качество сжатия: (\d+)%')
+                            quality_pattern2 = re.compile(r'-> Успех! Размер .* c качеством (\d+)')
+                            # Добавляем поиск специального маркера
+                            quality_marker = re.compile(r'\[QUALITY_MARKER\] НАЙДЕНО_КАЧЕСТВО_ДЛЯ_ИЗОБРАЖЕНИЯ: (\d+)')
+                            
+                            # Сначала ищем в последних 100 строках (самая свежая информация)
+                            recent_lines = log_lines[-100:] if len(log_lines) > 100 else log_lines
+                            
+                            for line in reversed(recent_lines):
+                                # Приоритетно ищем специальный маркер
+                                match = quality_marker.search(line)
+                                if match:
+                                    found_quality = int(match.group(1))
+                                    successful_quality = found_quality
+                                    print(f"[PROCESSOR]   НАЙДЕН СПЕЦИАЛЬНЫЙ МАРКЕР КАЧЕСТВА: {successful_quality}%", file=sys.stderr)
+                                    quality_found = True
+                                    break
+                                    
+                                match = quality_pattern1.search(line)
+                                if match:
+                                    found_quality = int(match.group(1))
+                                    successful_quality = found_quality
+                                    print(f"[PROCESSOR]   Определено оптимальное качество из последних логов (pattern 1): {successful_quality}%", file=sys.stderr)
+                                    quality_found = True
+                                    break
+                                    
+                                match = quality_pattern2.search(line)
+                                if match:
+                                    found_quality = int(match.group(1))
+                                    successful_quality = found_quality
+                                    print(f"[PROCESSOR]   Определено оптимальное качество из последних логов (pattern 2): {successful_quality}%", file=sys.stderr)
+                                    quality_found = True
+                                    break
+                            
+                            # Если не нашли в последних строках, ищем во всем прочитанном хвосте лога
+                            if not quality_found:
+                                print(f"[PROCESSOR]   Качество не найдено в последних строках логов, ищем в прочитанной части лога...", file=sys.stderr)
+                                for line in reversed(log_lines):
                                     match = quality_pattern1.search(line)
                                     if match:
                                         found_quality = int(match.group(1))
                                         successful_quality = found_quality
-                                        print(f"[PROCESSOR]   Определено оптимальное качество из последних логов (pattern 1): {successful_quality}%", file=sys.stderr)
+                                        print(f"[PROCESSOR]   Определено оптимальное качество из всех логов: {successful_quality}%", file=sys.stderr)
                                         quality_found = True
                                         break
-                                        
-                                    match = quality_pattern2.search(line)
-                                    if match:
-                                        found_quality = int(match.group(1))
-                                        successful_quality = found_quality
-                                        print(f"[PROCESSOR]   Определено оптимальное качество из последних логов (pattern 2): {successful_quality}%", file=sys.stderr)
-                                        quality_found = True
-                                        break
-                                
-                                # Если не нашли в последних строках, ищем во всем файле
-                                if not quality_found:
-                                    print(f"[PROCESSOR]   Качество не найдено в последних строках логов, ищем во всем файле...", file=sys.stderr)
-                                    for line in reversed(log_lines):
-                                        match = quality_pattern1.search(line)
-                                        if match:
-                                            found_quality = int(match.group(1))
-                                            successful_quality = found_quality
-                                            print(f"[PROCESSOR]   Определено оптимальное качество из всех логов: {successful_quality}%", file=sys.stderr)
+                            
+                            # Если все еще не нашли, попробуем прочитать из временного файла
+                            if not quality_found:
+                                try:
+                                    temp_quality_file = os.path.join(tempfile.gettempdir(), "last_image_quality.txt")
+                                    if os.path.exists(temp_quality_file):
+                                        with open(temp_quality_file, "r") as qf:
+                                            file_quality = int(qf.read().strip())
+                                            successful_quality = file_quality
+                                            print(f"[PROCESSOR]   Определено качество из временного файла: {successful_quality}%", file=sys.stderr)
                                             quality_found = True
-                                            break
-                                
-                                # Если все еще не нашли, попробуем прочитать из временного файла
-                                if not quality_found:
-                                    try:
-                                        temp_quality_file = os.path.join(tempfile.gettempdir(), "last_image_quality.txt")
-                                        if os.path.exists(temp_quality_file):
-                                            with open(temp_quality_file, "r") as qf:
-                                                file_quality = int(qf.read().strip())
-                                                successful_quality = file_quality
-                                                print(f"[PROCESSOR]   Определено качество из временного файла: {successful_quality}%", file=sys.stderr)
-                                                quality_found = True
-                                    except Exception as file_err:
-                                        print(f"[PROCESSOR]   Ошибка чтения временного файла с качеством: {file_err}", file=sys.stderr)
-                                
-                                # Если все еще не нашли, используем мин. значение
-                                if not quality_found:
-                                    successful_quality = MIN_IMG_QUALITY  # Прямое использование мин. качества
-                                    print(f"[PROCESSOR]   Качество не найдено в логах. Используем минимальное значение: {successful_quality}%", file=sys.stderr)
+                                except Exception as file_err:
+                                    print(f"[PROCESSOR]   Ошибка чтения временного файла с качеством: {file_err}", file=sys.stderr)
+                            
+                            # Если все еще не нашли, используем мин. значение
+                            if not quality_found:
+                                successful_quality = MIN_IMG_QUALITY  # Прямое использование мин. качества
+                                print(f"[PROCESSOR]   Качество не найдено в логах. Используем минимальное значение: {successful_quality}%", file=sys.stderr)
                         except Exception as log_e:
                             print(f"[PROCESSOR WARNING]   Ошибка при чтении лог-файла: {log_e}. Используем минимальное качество.", file=sys.stderr)
                             successful_quality = MIN_IMG_QUALITY  # Минимальное качество без добавления
                     
                     # Сообщаем о выбранном качестве для всех последующих изображений
                     print(f"[PROCESSOR]   ВАЖНО: Для всех последующих изображений будет использовано качество {successful_quality}%", file=sys.stderr)
+                    
+                    # Качество известно - сжимаем все оставшиеся изображения, превышающие лимит, параллельно
+                    remaining_image_paths = []
+                    for later_result in row_search_results[excel_row_index + 1:]:
+                        if later_result is None or not later_result["found"]:
+                            continue
+                        later_image_path = later_result["images"][0]
+                        if later_image_path == image_path:
+                            # Это же изображение уже сжато выше
+                            continue
+                        later_size_bytes = image_file_sizes.get(later_image_path)
+                        if later_size_bytes is not None and later_size_bytes / 1024 > target_kb_per_image:
+                            remaining_image_paths.append(later_image_path)
+                    parallel_buffers = optimize_images_parallel(
+                        list(dict.fromkeys(remaining_image_paths)),
+                        target_kb_per_image,
+                        successful_quality
+                    )
+                    if optimized_buffer and optimized_buffer.getbuffer().nbytes > 0:
+                        parallel_buffers[image_path] = io.BytesIO(optimized_buffer.getvalue())
                 else:
                     # Для всех последующих изображений используем найденное качество
-                    print(f"[PROCESSOR]   Используем найденное качество {successful_quality}% для изображения {image_path}", file=sys.stderr)
-                    optimized_buffer = image_utils.optimize_image_for_excel(
-                        image_path, 
-                        target_size_kb=target_kb_per_image,
-                        quality=successful_quality,  # Начальное = найденное качество 
-                        min_quality=successful_quality  # Мин. качество = найденное качество (без итераций)
-                    )
+                    if verbose_row:
+                        print(f"[PROCESSOR]   Используем найденное качество {successful_quality}% для изображения {image_path}", file=sys.stderr)
+                    parallel_buffer = parallel_buffers.get(image_path)
+                    if parallel_buffer is not None:
+                        # Копия буфера, так как одно изображение может использоваться в нескольких строках
+                        optimized_buffer = io.BytesIO(parallel_buffer.getvalue())
+                    else:
+                        optimized_buffer = image_utils.optimize_image_for_excel(
+                            image_path, 
+                            target_size_kb=target_kb_per_image,
+                            quality=successful_quality,  # Начальное = найденное качество 
+                            min_quality=successful_quality  # Мин. качество = найденное качество (без итераций)
+                        )
+                        if optimized_buffer and optimized_buffer.getbuffer().nbytes > 0:
+                            parallel_buffers[image_path] = io.BytesIO(optimized_buffer.getvalue())
             except Exception as e:
                 print(f"[PROCESSOR ERROR]   Ошибка при оптимизации изображения: {e}", file=sys.stderr)
                 # Если не удалось оптимизировать, попробуем загрузить оригинальное изображение
@@ -579,7 +771,8 @@ def process_excel_file(
         
         if optimized_buffer and optimized_buffer.getbuffer().nbytes > 0:
             buffer_size_kb = optimized_buffer.tell() / 1024
-            print(f"[PROCESSOR]   Размер буфера для вставки: {buffer_size_kb:.1f} КБ", file=sys.stderr)
+            if verbose_row:
+                print(f"[PROCESSOR]   Размер буфера для вставки: {buffer_size_kb:.1f} КБ", file=sys.stderr)
             current_image_size_kb = buffer_size_kb
             total_processed_image_size_kb += current_image_size_kb
             
@@ -589,12 +782,13 @@ def process_excel_file(
                 verification_img = PILImage.open(optimized_buffer)
                 img_format = verification_img.format
                 img_width_px, img_height_px = verification_img.size
-                print(f"[PROCESSOR]   ВЕРИФИКАЦИЯ: буфер содержит изображение формата {img_format}, {img_width_px}x{img_height_px}", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR]   ВЕРИФИКАЦИЯ: буфер содержит изображение формата {img_format}, {img_width_px}x{img_height_px}", file=sys.stderr)
                 
                 # Создаем временную копию буфера для сохранения в файл (для отладки)
                 try:
                     debug_copy = io.BytesIO(optimized_buffer.getvalue())
-                    temp_debug_path = os.path.join(tempfile.gettempdir(), f"debug_image_{time.time()}.jpg")
+                    temp_debug_path = f"{temp_dir_prefix}debug_image_{time.time()}.jpg"
                     with open(temp_debug_path, "wb") as debug_file:
                         debug_file.write(debug_copy.getvalue())
                     print(f"[PROCESSOR]   Создана отладочная копия изображения: {temp_debug_path}", file=sys.stderr)
@@ -607,7 +801,7 @@ def process_excel_file(
                 print(f"[PROCESSOR] ОШИБКА ВЕРИФИКАЦИИ: Буфер не содержит корректного изображения: {verify_e}", file=sys.stderr)
                 # Пробуем сохранить проблемный буфер для анализа
                 try:
-                    error_path = os.path.join(tempfile.gettempdir(), f"error_buffer_{time.time()}.bin")
+                    error_path = f"{temp_dir_prefix}error_buffer_{time.time()}.bin"
                     with open(error_path, "wb") as error_file:
                         error_file.write(optimized_buffer.getvalue())
                     print(f"[PROCESSOR]   Сохранён проблемный буфер для анализа: {error_path}", file=sys.stderr)
@@ -632,7 +826,8 @@ def process_excel_file(
                 optimized_buffer.seek(0)
                 img = PILImage.open(optimized_buffer)
                 img_width_px, img_height_px = img.size
-                print(f"[PROCESSOR]     Получены размеры из буфера: {img_width_px}x{img_height_px}", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR]     Получены размеры из буфера: {img_width_px}x{img_height_px}", file=sys.stderr)
             except Exception as dim_e:
                 print(f"[PROCESSOR] WARNING: Не удалось получить размеры изображения из буфера: {dim_e}", file=sys.stderr)
             
@@ -657,7 +852,8 @@ def process_excel_file(
                 
                 # Переводим в пиксели для расчета размеров изображения
                 target_width_px = int(column_width_excel * EXCEL_WIDTH_TO_PIXEL_RATIO)
-                print(f"[PROCESSOR] Используем фактическую ширину столбца {image_col_letter_excel}: {column_width_excel:.2f} ед. Excel ({target_width_px} пикс.)", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR] Используем фактическую ширину столбца {image_col_letter_excel}: {column_width_excel:.2f} ед. Excel ({target_width_px} пикс.)", file=sys.stderr)
                 
                 # Убираем корректировку - используем точную ширину столбца
                 # 2. Получаем размеры исходного изображения для сохранения пропорций
@@ -666,7 +862,8 @@ def process_excel_file(
                 img_width, img_height = pil_image.size
                 aspect_ratio = img_height / img_width if img_width > 0 else 1.0
                 optimized_buffer.seek(0)
-                print(f"[PROCESSOR] Размеры оригинального изображения: {img_width}x{img_height}, соотношение сторон: {aspect_ratio:.2f}", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR] Размеры оригинального изображения: {img_width}x{img_height}, соотношение сторон: {aspect_ratio:.2f}", file=sys.stderr)
                 
                 # Рассчитываем высоту изображения с сохранением пропорций
                 target_height_px = int(target_width_px * aspect_ratio)
@@ -675,7 +872,8 @@ def process_excel_file(
                 anchor_cell = f"{image_col_letter_excel}{excel_row_index + 1 + header_row}"
                 
                 # Вставляем изображение с рассчитанными размерами и черным фоном
-                print(f"[PROCESSOR] Вставляем изображение с размерами: {target_width_px}x{target_height_px} пикс. и черным фоном", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR] Вставляем изображение с размерами: {target_width_px}x{target_height_px} пикс. и черным фоном", file=sys.stderr)
                 excel_utils.insert_image_from_buffer(
                     ws, 
                     optimized_buffer,
@@ -691,11 +889,13 @@ def process_excel_file(
                 # Преобразуем пиксели в единицы Excel и добавляем 1 пиксель к высоте
                 row_height_excel = (target_height_px + 1) * EXCEL_PX_TO_PT_RATIO
                 excel_utils.set_row_height(ws, row_num, row_height_excel)
-                print(f"[PROCESSOR] Установлена высота строки {row_num}: {row_height_excel:.2f} ед. Excel для вмещения изображения (с запасом +1px)", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR] Установлена высота строки {row_num}: {row_height_excel:.2f} ед. Excel для вмещения изображения (с запасом +1px)", file=sys.stderr)
                 
                 # Увеличиваем счетчик успешно вставленных изображений
                 images_inserted += 1
-                print(f"[PROCESSOR] Изображение успешно вставлено в ячейку {anchor_cell}", file=sys.stderr)
+                if verbose_row:
+                    print(f"[PROCESSOR] Изображение успешно вставлено в ячейку {anchor_cell}", file=sys.stderr)
                 
             except Exception as e:
                 print(f"[PROCESSOR ERROR] Ошибка при вставке изображения: {e}", file=sys.stderr)
@@ -712,8 +912,9 @@ def process_excel_file(
             print(f"[PROCESSOR WARNING] Пустой буфер изображения для артикула '{article_str}' (строка {excel_row_index})", file=sys.stderr)
         
         # Вывод прогресса обработки строк в процентах
-        extra_info = f"Строка: {excel_row_index + 1}, артикул: {article_str}"
-        print_progress(rows_processed, total_rows, extra_info)
+        if verbose_row:
+            extra_info = f"Строка: {excel_row_index + 1}, артикул: {article_str}"
+            print_progress(rows_processed, total_rows, extra_info)
     
     # --- Сохранение результата ---
     print("\n[PROCESSOR] --- Сохранение результата ---", file=sys.stderr)
@@ -731,7 +932,7 @@ def process_excel_file(
         if output_filename:
             result_file_path = os.path.join(output_folder, output_filename)
         else:
-            output_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}_with Images_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            output_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}_with Images_{time.strftime('%Y%m%d_%H%M%S')}.xlsx"
             result_file_path = os.path.join(output_folder, output_filename)
         
         # Сохраняем Excel-файл
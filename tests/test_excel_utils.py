@@ -0,0 +1,53 @@
+"""
+Тесты чтения листов Excel (utils.excel_utils)
+"""
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from utils import excel_utils
+
+
+@pytest.fixture
+def sheet_file(tmp_path):
+    """Книга с пустыми ячейками, строками из na_values и числами"""
+    file_path = tmp_path / "sheet.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Данные"
+    ws.append(["Артикул", "Цена", "Примечание"])
+    ws.append(["A-1", 10, None])
+    ws.append(["N/A", 2.5, "NULL"])
+    ws.append([None, None, "текст"])
+    ws.append(["#N/A", 7, "n/a"])
+    ws.append(["12345", 3, None])
+    wb.save(file_path)
+    return str(file_path)
+
+
+@pytest.mark.parametrize("use_calamine", [False, True])
+def test_read_sheet_dataframe_matches_read_excel(sheet_file, monkeypatch, use_calamine):
+    if use_calamine:
+        if excel_utils.CalamineWorkbook is None:
+            pytest.skip("python-calamine не установлен")
+    else:
+        monkeypatch.setattr(excel_utils, "CalamineWorkbook", None)
+
+    expected = pd.read_excel(sheet_file, sheet_name="Данные", header=None)
+    result = excel_utils.read_sheet_dataframe(sheet_file, "Данные")
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_read_sheet_dataframe_missing_sheet(sheet_file):
+    with pytest.raises(ValueError):
+        excel_utils.read_sheet_dataframe(sheet_file, "Нет такого листа")
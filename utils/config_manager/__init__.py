@@ -1,13 +1,15 @@
 import os
 import logging
+import functools
 from typing import Any
 from .config_manager import ConfigManager
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
 def get_downloads_folder():
-    """Возвращает путь к папке с изображениями по умолчанию"""
+    """Возвращает путь к папке с изображениями по умолчанию (результат кэшируется)"""
     # Возвращаем сетевой путь вместо папки загрузок
     return r"\\10.10.100.2\Foto"
     
@@ -76,6 +78,18 @@ def set_setting(path: str, value: Any) -> None:
     """
     get_config_manager().set_setting(path, value)
 
+def batch_update(updates: dict) -> bool:
+    """
+    Применяет несколько изменений настроек и сохраняет их одной записью
+    
+    Args:
+        updates: Словарь вида {путь в точечной нотации: значение}
+        
+    Returns:
+        True, если настройки успешно сохранены, иначе False
+    """
+    return get_config_manager().batch_update(updates)
+
 def save_settings() -> bool:
     """
     Сохраняет текущие настройки
@@ -4,11 +4,41 @@
 import os
 import json
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+# orjson (необязательная зависимость) сериализует настройки сразу в байты UTF-8 и заметно
+# быстрее стандартного json; без него используется стандартный модуль
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Маркер отсутствующей настройки (None может быть допустимым значением)
+_MISSING = object()
+
+def _dump_settings(settings: Dict[str, Any]) -> bytes:
+    """
+    Сериализует настройки в JSON (UTF-8, с отступами)
+    
+    Args:
+        settings: Словарь настроек
+        
+    Returns:
+        Байты JSON в кодировке UTF-8
+    """
+    # Отступ совпадает с OPT_INDENT_2, чтобы формат файла не зависел от наличия orjson
+    if orjson is not None:
+        try:
+            return orjson.dumps(settings, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            # orjson не принимает, например, нестроковые ключи, которые допускает json
+            pass
+    return json.dumps(settings, indent=2, ensure_ascii=False).encode('utf-8')
+
 class ConfigManager:
     """
     Класс для управления настройками приложения
@@ -23,6 +53,8 @@ class ConfigManager:
         """
         self.presets_folder = presets_folder
         self.current_settings = {}
+        # Блокировка для согласованной записи файла настроек
+        self._lock = threading.RLock()
         
         # Создаем папку для пресетов, если она не существует
         os.makedirs(self.presets_folder, exist_ok=True)
@@ -80,6 +112,18 @@ class ConfigManager:
         
         return current
     
+    def get_many(self, defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Получает значения нескольких настроек за один вызов
+        
+        Args:
+            defaults: Словарь вида {путь в формате dot notation: значение по умолчанию}
+            
+        Returns:
+            Словарь вида {путь: значение настройки или значение по умолчанию}
+        """
+        return {path: self.get_setting(path, default) for path, default in defaults.items()}
+    
     def set_setting(self, path: str, value: Any):
         """
         Устанавливает значение настройки по указанному пути
@@ -114,10 +158,14 @@ class ConfigManager:
             True, если настройки успешно сохранены, иначе False
         """
         preset_path = os.path.join(self.presets_folder, "settings.json")
+        temp_path = f"{preset_path}.tmp"
         
         try:
-            with open(preset_path, 'w', encoding='utf-8') as f:
-                json.dump(self.current_settings, f, indent=4, ensure_ascii=False)
+            with self._lock:
+                # Пишем во временный файл и атомарно заменяем им файл настроек
+                with open(temp_path, 'wb') as f:
+                    f.write(_dump_settings(self.current_settings))
+                os.replace(temp_path, preset_path)
             
             logger.info("Настройки успешно сохранены")
             return True
@@ -125,6 +173,29 @@ class ConfigManager:
             logger.error(f"Ошибка при сохранении настроек: {e}")
             return False
     
+    def batch_update(self, updates: Dict[str, Any]) -> bool:
+        """
+        Применяет несколько изменений настроек и сохраняет их в файл одной записью.
+        Если все значения совпадают с текущими, файл не перезаписывается
+        
+        Args:
+            updates: Словарь вида {путь в формате dot notation: новое значение}
+            
+        Returns:
+            True, если настройки успешно сохранены (или сохранять нечего), иначе False
+        """
+        if not updates:
+            return True
+        
+        with self._lock:
+            changed = {path: value for path, value in updates.items()
+                       if self.get_setting(path, _MISSING) != value}
+            if not changed:
+                return True
+            for path, value in changed.items():
+                self.set_setting(path, value)
+            return self.save_settings()
+    
     def load_settings(self, preset_name: str = None) -> bool:
         """
         Загружает настройки из файла
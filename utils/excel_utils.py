@@ -8,6 +8,8 @@ from pathlib import Path
 import tempfile
 import time
 import io
+import zipfile
+import xml.etree.ElementTree as ET
 
 import pandas as pd
 import openpyxl
@@ -19,8 +21,157 @@ from openpyxl.drawing.image import Image as XLImage
 from openpyxl.worksheet.dimensions import ColumnDimension, RowDimension
 from openpyxl.worksheet.table import Table, TableStyleInfo
 
+# python-calamine (необязательная зависимость) разбирает xlsx на Rust
+# в разы быстрее openpyxl; без него чтение идет через openpyxl в режиме read_only
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
 logger = logging.getLogger(__name__)
 
+# Строки, которые pd.read_excel по умолчанию считает пустыми значениями (na_values),
+# в том числе закэшированные ошибки формул вроде #N/A
+_PANDAS_DEFAULT_NA = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+})
+
+def get_sheet_names(file_path: str) -> List[str]:
+    """
+    Возвращает имена листов книги Excel, читая только xl/workbook.xml из zip-архива xlsx.
+    В отличие от openpyxl.load_workbook (даже в режиме read_only), не разбирает
+    таблицу общих строк и стили, поэтому на больших файлах работает за миллисекунды.
+    Если файл не является xlsx-архивом обычной структуры, используется openpyxl.
+    
+    Args:
+        file_path (str): Путь к Excel-файлу
+    
+    Returns:
+        List[str]: Имена листов в порядке их следования в книге
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open('xl/workbook.xml') as workbook_xml:
+                sheet_names = []
+                # Пространство имен отличается у обычного и strict-формата, поэтому
+                # сравниваем только локальное имя тега
+                for _, element in ET.iterparse(workbook_xml, events=('end',)):
+                    tag = element.tag.rsplit('}', 1)[-1]
+                    if tag == 'sheet':
+                        sheet_names.append(element.get('name'))
+                    elif tag == 'sheets':
+                        # Список листов прочитан, остальная часть файла не нужна
+                        break
+                return sheet_names
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        logger.debug(f"Не удалось прочитать имена листов из workbook.xml, используется openpyxl: {e}")
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True, keep_links=False)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def _read_sheet_rows_calamine(file_path: str, sheet_name: str) -> List[list]:
+    """
+    Читает значения ячеек листа через python-calamine.
+    
+    Args:
+        file_path (str): Путь к Excel-файлу
+        sheet_name (str): Имя листа
+    
+    Returns:
+        List[list]: Строки листа, пустые ячейки равны None
+    """
+    workbook = CalamineWorkbook.from_path(file_path)
+    if sheet_name not in workbook.sheet_names:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    
+    # skip_empty_area=False сохраняет пустые строки и колонки в начале листа,
+    # иначе номера строк и буквы колонок разошлись бы с Excel.
+    # Числа calamine отдает как float, а openpyxl целые значения возвращает как int -
+    # приводим к тому же виду, чтобы артикулы вида 12345 не превращались в "12345.0"
+    return [
+        [
+            None if value == '' else
+            int(value) if isinstance(value, float) and value.is_integer() else value
+            for value in row
+        ]
+        for row in workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+    ]
+
+def _read_sheet_rows_openpyxl(file_path: str, sheet_name: str) -> List[list]:
+    """
+    Читает значения ячеек листа через openpyxl в режиме read_only (потоково,
+    без построения полной модели ячеек и стилей книги).
+    
+    Args:
+        file_path (str): Путь к Excel-файлу
+        sheet_name (str): Имя листа
+    
+    Returns:
+        List[list]: Строки листа, пустые ячейки равны None
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        return [list(row_values) for row_values in wb[sheet_name].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+def read_sheet_dataframe(file_path: str, sheet_name: str) -> pd.DataFrame:
+    """
+    Читает лист Excel в DataFrame без заголовка (как pd.read_excel(header=None)).
+    Использует python-calamine, если он установлен, иначе openpyxl в режиме read_only.
+    Как и pd.read_excel, строки из стандартного набора na_values ('N/A', '#N/A', 'NULL' и т.д.)
+    заменяются на NaN.
+    
+    Args:
+        file_path (str): Путь к Excel-файлу
+        sheet_name (str): Имя листа
+    
+    Returns:
+        pd.DataFrame: Данные листа с числовыми названиями колонок
+    
+    Raises:
+        ValueError: Если лист не найден
+    """
+    rows = None
+    if CalamineWorkbook is not None:
+        try:
+            rows = _read_sheet_rows_calamine(file_path, sheet_name)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать лист '{sheet_name}' через calamine, используется openpyxl: {e}")
+    if rows is None:
+        rows = _read_sheet_rows_openpyxl(file_path, sheet_name)
+    
+    # Как и pd.read_excel, отбрасываем пустые ячейки в конце строк и пустые строки
+    # в конце листа, короткие строки дополняем до общей ширины
+    last_data_row = 0
+    max_width = 0
+    for row_number, row in enumerate(rows, start=1):
+        while row and row[-1] is None:
+            row.pop()
+        if row:
+            last_data_row = row_number
+            max_width = max(max_width, len(row))
+    
+    # Строки из набора na_values заменяются на NaN уже после обрезки, как в pd.read_excel:
+    # строка листа, содержащая только 'N/A', не считается пустой и не отбрасывается
+    nan = float('nan')
+    records = [
+        [
+            nan if value is None or (isinstance(value, str) and value in _PANDAS_DEFAULT_NA) else value
+            for value in row
+        ] + [nan] * (max_width - len(row))
+        for row in rows[:last_data_row]
+    ]
+    return pd.DataFrame.from_records(records)
+
 def open_workbook(file_path: str) -> Workbook:
     """
     Открывает Excel-файл и возвращает объект Workbook.
@@ -1134,9 +1285,10 @@ def insert_images_to_excel(writer, df, image_column):
         # Добавляем изображения в каждую ячейку
         row_offset = 1  # Учитываем строку заголовка
         
-        for idx, row in df.iterrows():
-            if pd.notna(row[image_column]):
-                image_paths = str(row[image_column]).split(",")
+        # Значения колонки извлекаем одним списком, без построения Series на каждую строку
+        for idx, image_paths_value in zip(df.index, df[image_column].tolist()):
+            if pd.notna(image_paths_value):
+                image_paths = str(image_paths_value).split(",")
                 
                 for i, img_path in enumerate(image_paths):
                     if os.path.exists(img_path.strip()):
@@ -1175,6 +1327,8 @@ def save_dataframe_with_images(excel_file: str, df: pd.DataFrame,
     Returns:
         Dict[str, Any]: Статистика обработки
     """
+    from . import image_utils
+    
     try:
         logger.info(f"Начинаем обработку Excel файла: {excel_file}")
         logger.info(f"Артикулы в колонке: {article_column}, изображения в колонке: {image_column}")
@@ -1188,6 +1342,10 @@ def save_dataframe_with_images(excel_file: str, df: pd.DataFrame,
         if article_column not in df.columns:
             logger.error(f"Колонка с артикулами '{article_column}' не найдена в DataFrame")
             raise ValueError(f"Колонка с артикулами '{article_column}' не найдена в DataFrame")
+        
+        # Индексы папок с изображениями живут весь процесс: сбрасываем устаревшие,
+        # чтобы не пропустить новые изображения и не вернуть пути к удаленным файлам
+        image_utils.invalidate_stale_folder_indexes()
             
         # Статистика
         stats = {
@@ -1203,9 +1361,11 @@ def save_dataframe_with_images(excel_file: str, df: pd.DataFrame,
         wb = openpyxl.Workbook()
         ws = wb.active
         
-        # Проставляем заголовки
-        for col_idx, col_name in enumerate(df.columns, 1):
-            ws.cell(row=1, column=col_idx).value = col_name
+        # Проставляем заголовки и данные построчным добавлением кортежей:
+        # ws.append заметно дешевле адресной записи каждой ячейки через ws.cell
+        ws.append(list(df.columns))
+        for row_values in df.itertuples(index=False, name=None):
+            ws.append(row_values)
         
         # Устанавливаем ширину колонки с изображениями
         # Находим индекс колонки с изображениями
@@ -1223,16 +1383,11 @@ def save_dataframe_with_images(excel_file: str, df: pd.DataFrame,
             logger.warning(f"Колонка с изображениями '{image_column}' не найдена в DataFrame")
             image_column_letter = 'B'  # Значение по умолчанию
         
-        # Заполняем данные и вставляем изображения
-        for df_idx, row_data in df.iterrows():
-            excel_row = df_idx + 2  # +2 из-за заголовка и 1-индексации Excel
-            
-            # Заполняем данные из DataFrame
-            for col_idx, col_name in enumerate(df.columns, 1):
-                ws.cell(row=excel_row, column=col_idx).value = row_data[col_name]
+        # Вставляем изображения (данные уже записаны выше)
+        for row_position, article in enumerate(df[article_column].tolist()):
+            excel_row = row_position + 2  # +2 из-за заголовка и 1-индексации Excel
             
             # Обрабатываем изображение
-            article = row_data.get(article_column)
             if pd.notna(article) and article:
                 stats["total_articles"] += 1
                 
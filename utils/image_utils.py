@@ -6,6 +6,7 @@ import re
 import io
 import logging
 import math
+import functools
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any, Union, Set
 import sys
@@ -15,6 +16,26 @@ from PIL import Image as PILImage
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны нормализации артикулов компилируются один раз при импорте модуля.
+# \w в Python совпадает с символами, для которых str.isalnum() истинно, и с '_'
+_EXCEL_ARTICLE_SPECIAL_RE = re.compile(r'[^\w ]|_')
+_FILENAME_ARTICLE_SPECIAL_RE = re.compile(r'[^\w ]')
+
+@functools.lru_cache(maxsize=16)
+def _extension_set(supported_extensions: Tuple[str, ...]) -> frozenset:
+    """
+    Возвращает множество поддерживаемых расширений в нижнем регистре.
+    Проверка расширения файла сводится к одному поиску в множестве
+    вместо перебора endswith по всем расширениям.
+    
+    Args:
+        supported_extensions (Tuple[str, ...]): Поддерживаемые расширения файлов
+        
+    Returns:
+        frozenset: Расширения в нижнем регистре
+    """
+    return frozenset(ext.lower() for ext in supported_extensions)
+
 def normalize_article(article: Any, for_excel: bool = False) -> str:
     """
     Нормализует артикул для поиска.
@@ -43,35 +64,28 @@ def normalize_article(article: Any, for_excel: bool = False) -> str:
     if for_excel:
         # Для данных из Excel: заменяем все спецсимволы (кроме пробелов) на дефисы
         # Сохраняем буквы, цифры и пробелы, остальное заменяем на дефисы
-        normalized = ''
-        for char in article_str:
-            if char.isalnum() or char == ' ':
-                normalized += char
-            else:
-                normalized += '-'
+        normalized = _EXCEL_ARTICLE_SPECIAL_RE.sub('-', article_str)
         # Приводим к нижнему регистру
         normalized = normalized.lower()
     else:
         # Для имен файлов: заменяем все спецсимволы (кроме пробелов и нижнего подчеркивания) на дефисы
         # Сохраняем буквы, цифры, пробелы и нижнее подчеркивание
-        normalized = ''
-        for char in article_str:
-            if char.isalnum() or char == ' ' or char == '_':
-                normalized += char
-            else:
-                normalized += '-'
+        normalized = _FILENAME_ARTICLE_SPECIAL_RE.sub('-', article_str)
         # Приводим к нижнему регистру
         normalized = normalized.lower()
     
     return normalized
 
-def find_images_recursively(folder: str, supported_extensions: Tuple[str, ...]) -> Dict[str, str]:
+def find_images_recursively(folder: str, supported_extensions: Tuple[str, ...],
+                            dir_mtimes: Optional[Dict[str, int]] = None) -> Dict[str, str]:
     """
     Рекурсивно находит все изображения в папке и её подпапках
     
     Args:
         folder (str): Путь к корневой папке для поиска
         supported_extensions (Tuple[str, ...]): Поддерживаемые расширения файлов
+        dir_mtimes (Optional[Dict[str, int]]): Если передан, заполняется временем изменения
+            (st_mtime_ns) каждой обойденной папки
         
     Returns:
         Dict[str, str]: Словарь {имя_файла: полный_путь}
@@ -83,10 +97,17 @@ def find_images_recursively(folder: str, supported_extensions: Tuple[str, ...])
         logger.warning(f"Папка не существует: {folder}")
         return result
         
+    extension_set = _extension_set(tuple(supported_extensions))
+    
     # Рекурсивно обходим все вложенные папки
     for root, dirs, files in os.walk(folder):
+        if dir_mtimes is not None:
+            try:
+                dir_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                pass
         for file in files:
-            if any(file.lower().endswith(ext) for ext in supported_extensions):
+            if os.path.splitext(file)[1].lower() in extension_set:
                 file_path = os.path.join(root, file)
                 # Сохраняем полный путь к файлу
                 result[file] = file_path
@@ -611,8 +632,9 @@ def get_images_in_folder(folder_path: str,
         
         image_paths = []
         
+        extension_set = _extension_set(tuple(supported_extensions))
         for filename in os.listdir(folder_path):
-            if any(filename.lower().endswith(ext) for ext in supported_extensions):
+            if os.path.splitext(filename)[1].lower() in extension_set:
                 image_path = os.path.join(folder_path, filename)
                 image_paths.append(image_path)
         
@@ -756,8 +778,9 @@ def extract_articles_from_image_names(folder_path: str,
         
         article_to_image = {}
         
+        extension_set = _extension_set(tuple(supported_extensions))
         for filename in os.listdir(folder_path):
-            if any(filename.lower().endswith(ext) for ext in supported_extensions):
+            if os.path.splitext(filename)[1].lower() in extension_set:
                 # Извлекаем имя файла без расширения
                 name_without_ext = os.path.splitext(filename)[0]
                 
@@ -844,6 +867,103 @@ def find_images_by_article(article: Any, images_folder: str,
         logger.error(f"Ошибка при поиске изображений по артикулу '{article}': {e}")
         return []
 
+# Кэш индексов папок с изображениями:
+# {(папка, рекурсивный поиск, расширения): {нормализованное имя: {"filepath", "original_name"}}}
+_folder_index_cache: Dict[Tuple[str, bool, Tuple[str, ...]], Dict[str, Dict[str, str]]] = {}
+# Время изменения (st_mtime_ns) всех папок, обойденных при построении каждого индекса
+_folder_index_mtimes: Dict[Tuple[str, bool, Tuple[str, ...]], Dict[str, int]] = {}
+
+def clear_folder_index_cache() -> None:
+    """
+    Очищает кэш индексов папок с изображениями.
+    """
+    _folder_index_cache.clear()
+    _folder_index_mtimes.clear()
+
+def invalidate_stale_folder_indexes() -> None:
+    """
+    Удаляет из кэша индексы папок, содержимое которых изменилось.
+    Добавление, удаление или переименование файла меняет время изменения содержащей
+    его папки, поэтому достаточно одного stat на каждую папку вместо повторного обхода
+    всех файлов. Вызывается в начале каждой операции, использующей индексы
+    (process_excel_file, save_dataframe_with_images).
+    """
+    for cache_key in list(_folder_index_cache):
+        dir_mtimes = _folder_index_mtimes.get(cache_key)
+        is_fresh = bool(dir_mtimes)
+        if is_fresh:
+            try:
+                is_fresh = all(os.stat(dir_path).st_mtime_ns == mtime
+                               for dir_path, mtime in dir_mtimes.items())
+            except OSError:
+                is_fresh = False
+        if not is_fresh:
+            _folder_index_cache.pop(cache_key, None)
+            _folder_index_mtimes.pop(cache_key, None)
+            logger.debug(f"Индекс папки {cache_key[0]} устарел и будет построен заново")
+
+def build_folder_index(images_folder: str,
+                       supported_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'),
+                       search_recursively: bool = True) -> Dict[str, Dict[str, str]]:
+    """
+    Строит (или берет из кэша) индекс изображений папки по нормализованным именам файлов.
+    Папка обходится один раз, последующие вызовы для той же папки возвращают готовый индекс,
+    пока он не будет сброшен invalidate_stale_folder_indexes или clear_folder_index_cache.
+    
+    Args:
+        images_folder (str): Путь к папке с изображениями
+        supported_extensions (Tuple[str, ...]): Поддерживаемые расширения файлов
+        search_recursively (bool): Искать ли рекурсивно в подпапках
+        
+    Returns:
+        Dict[str, Dict[str, str]]: Словарь {нормализованное имя: {"filepath": путь, "original_name": имя без расширения}}
+    """
+    cache_key = (os.path.abspath(images_folder), search_recursively, tuple(supported_extensions))
+    cached_index = _folder_index_cache.get(cache_key)
+    if cached_index is not None:
+        return cached_index
+    
+    # Словарь для быстрого поиска по нормализованному имени
+    normalized_name_to_path = {}
+    dir_mtimes = {}
+    
+    # Получаем все файлы в зависимости от режима поиска
+    if search_recursively:
+        # Рекурсивно получаем все файлы из папки и подпапок
+        all_files = find_images_recursively(images_folder, supported_extensions, dir_mtimes)
+    else:
+        # Ищем только в указанной папке
+        if not os.path.isdir(images_folder):
+            logger.error(f"Указанный путь не является папкой: {images_folder}")
+            return normalized_name_to_path
+        
+        try:
+            dir_mtimes[images_folder] = os.stat(images_folder).st_mtime_ns
+        except OSError:
+            pass
+        all_files = {}
+        extension_set = _extension_set(tuple(supported_extensions))
+        for filename in os.listdir(images_folder):
+            if os.path.splitext(filename)[1].lower() in extension_set:
+                all_files[filename] = os.path.join(images_folder, filename)
+    
+    # Строим словарь нормализованных имен
+    for filename, filepath in all_files.items():
+        name_without_ext = os.path.splitext(filename)[0]
+        # Сохраняем оригинальное имя (без расширения) для строгого сравнения
+        original_name = name_without_ext.strip()
+        normalized_name = normalize_article(name_without_ext)
+        normalized_name_to_path[normalized_name] = {
+            "filepath": filepath,
+            "original_name": original_name
+        }
+        logger.debug(f"Найдено изображение: {filename} (нормализованное имя: '{normalized_name}')")
+    
+    logger.debug(f"Индекс папки {images_folder}: {len(normalized_name_to_path)} изображений с поддерживаемыми расширениями")
+    _folder_index_cache[cache_key] = normalized_name_to_path
+    _folder_index_mtimes[cache_key] = dir_mtimes
+    return normalized_name_to_path
+
 def find_images_by_article_name(article: Any, images_folder: str,
                          supported_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'),
                          search_recursively: bool = True) -> List[str]:
@@ -880,87 +1000,37 @@ def find_images_by_article_name(article: Any, images_folder: str,
             
         logger.debug(f"Ищем изображения для артикула '{article}' (нормализованный: '{normalized_article_to_find}')")
         
-        # Словарь для быстрого поиска по нормализованному имени
-        normalized_name_to_path = {}
-        
-        # Получаем все файлы в зависимости от режима поиска
-        if search_recursively:
-            # Рекурсивно получаем все файлы из папки и подпапок
-            all_files = find_images_recursively(images_folder, supported_extensions)
-            
-            if not all_files:
-                logger.warning(f"Не найдено изображений в папке и подпапках: {images_folder}")
-                return []
-                
-            # Строим словарь нормализованных имен
-            for filename, filepath in all_files.items():
-                name_without_ext = os.path.splitext(filename)[0]
-                # Сохраняем оригинальное имя (без расширения) для строгого сравнения
-                original_name = name_without_ext.strip()
-                normalized_name = normalize_article(name_without_ext)
-                normalized_name_to_path[normalized_name] = {
-                    "filepath": filepath,
-                    "original_name": original_name
-                }
-                logger.debug(f"Найдено изображение: {filename} (нормализованное имя: '{normalized_name}')")
-        else:
-            # Ищем только в указанной папке
-            if not os.path.isdir(images_folder):
-                logger.error(f"Указанный путь не является папкой: {images_folder}")
-                return []
-                
-            for filename in os.listdir(images_folder):
-                if any(filename.lower().endswith(ext) for ext in supported_extensions):
-                    name_without_ext = os.path.splitext(filename)[0]
-                    # Сохраняем оригинальное имя (без расширения) для строгого сравнения
-                    original_name = name_without_ext.strip()
-                    normalized_name = normalize_article(name_without_ext)
-                    filepath = os.path.join(images_folder, filename)
-                    normalized_name_to_path[normalized_name] = {
-                        "filepath": filepath,
-                        "original_name": original_name
-                    }
-                    logger.debug(f"Найдено изображение: {filename} (нормализованное имя: '{normalized_name}')")
-            
-            if not normalized_name_to_path:
-                logger.warning(f"Не найдено изображений в папке: {images_folder}")
-                return []
-        
-        logger.debug(f"Всего найдено {len(normalized_name_to_path)} изображений с поддерживаемыми расширениями")
+        # Индекс папки строится один раз и переиспользуется для всех артикулов
+        normalized_name_to_path = build_folder_index(images_folder, supported_extensions, search_recursively)
+        if not normalized_name_to_path:
+            logger.warning(f"Не найдено изображений в папке: {images_folder}")
+            return []
         
         found_image_paths = []
         
-        # 1. Проверяем строгое совпадение (с учетом регистра и без нормализации)
-        for normalized_name, file_info in normalized_name_to_path.items():
-            if original_article == file_info["original_name"]:
-                image_path = file_info["filepath"]
+        # Индекс хранит по одному файлу на нормализованное имя, поэтому и строгое совпадение
+        # (с учетом регистра и без нормализации), и совпадение после нормализации
+        # может дать только запись с ключом нормализованного артикула
+        file_info = normalized_name_to_path.get(normalized_article_to_find)
+        if file_info:
+            image_path = file_info["filepath"]
+            is_strict_match = original_article == file_info["original_name"]
+            if is_strict_match:
                 logger.debug(f"Найдено строгое (точное) совпадение для артикула '{article}': {image_path}")
-                
-                if os.path.isfile(image_path) and os.access(image_path, os.R_OK):
-                    found_image_paths.append(image_path)
-                else:
-                    logger.warning(f"Найденный файл не существует или недоступен: {image_path}")
-        
-        # Если нашли хотя бы одно строгое совпадение, возвращаем его
-        if found_image_paths:
-            logger.info(f"Найдены строгие совпадения ({len(found_image_paths)} шт.) для артикула '{article}'")
-            return found_image_paths
-                
-        # 2. Проверяем точное совпадение после нормализации
-        for normalized_name, file_info in normalized_name_to_path.items():
-            if normalized_article_to_find == normalized_name:
-                image_path = file_info["filepath"]
+            else:
                 logger.debug(f"Найдено точное совпадение по нормализованным именам для артикула '{article}': {image_path}")
-                
-                if os.path.isfile(image_path) and os.access(image_path, os.R_OK):
-                    found_image_paths.append(image_path)
+            
+            if os.path.isfile(image_path) and os.access(image_path, os.R_OK):
+                found_image_paths.append(image_path)
+            else:
+                logger.warning(f"Найденный файл не существует или недоступен: {image_path}")
+            
+            if found_image_paths:
+                if is_strict_match:
+                    logger.info(f"Найдены строгие совпадения ({len(found_image_paths)} шт.) для артикула '{article}'")
                 else:
-                    logger.warning(f"Найденный файл не существует или недоступен: {image_path}")
-                    
-        # Если нашли точные совпадения после нормализации, возвращаем их
-        if found_image_paths:
-            logger.info(f"Найдены точные совпадения после нормализации ({len(found_image_paths)} шт.) для артикула '{article}'")
-            return found_image_paths
+                    logger.info(f"Найдены точные совпадения после нормализации ({len(found_image_paths)} шт.) для артикула '{article}'")
+                return found_image_paths
         
         # Если не найдены точные совпадения, ничего не возвращаем
         logger.warning(f"Изображения для артикула '{article}' (нормализованный: '{normalized_article_to_find}') не найдены.")
@@ -1070,8 +1140,7 @@ def find_images_in_multiple_folders(
         # Если нашли изображения, возвращаем результат
         if found_images:
             # Получаем имя файла без пути и расширения
-            match_name = os.path.basename(found_images[0])
-            match_name = os.path.splitext(match_name)[0]
+            match_name = os.path.splitext(found_images[0].rpartition(os.sep)[2])[0]
             
             logger.info(f"Найдены изображения для артикула '{article}' в папке #{folder_priority}: {folder_path}")
             return {